@@ -0,0 +1,108 @@
+"""
+Asinhroni vmesnik (asyncio) do poizvedb iz model.py.
+
+Poizvedbe tečejo v omejenem bazenu niti, zato ne zasedejo zanke
+dogodkov. Enake poizvedbe, ki so hkrati v teku, se izvedejo le enkrat
+in vsi čakajoči dobijo isti rezultat. Primer:
+
+    from asinhrono import asinhrono
+    event = await asinhrono.Event.poisci_po_id(5)
+    rezultati = await asinhrono.Event.poisci_rezultate_eventa(event)
+
+Metode, ki vračajo generatorje, vrnejo terko.
+"""
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+import model
+
+NITI = 8
+
+
+def kljuc_argumenta(argument):
+    """
+    Vrne vrednost, po kateri se prepoznajo enake poizvedbe.
+    Objekti modela so enaki, če sta enaka razred in id.
+    """
+    if isinstance(argument, (list, tuple)):
+        return tuple(kljuc_argumenta(a) for a in argument)
+    if type(argument).__module__ == model.__name__ and hasattr(argument, "id"):
+        return type(argument).__name__, argument.id
+    return argument
+
+
+class Razred:
+    """
+    Asinhroni ovoj razreda iz modela.
+    Vsaka metoda razreda postane korutina z enakimi argumenti.
+    """
+
+    def __init__(self, izvajalec, razred):
+        """
+        Konstruktor ovoja.
+        """
+        self._izvajalec = izvajalec
+        self._razred = razred
+
+    def __getattr__(self, ime):
+        """
+        Vrne korutino, ki izvede istoimensko metodo razreda.
+        """
+        metoda = getattr(self._razred, ime)
+        if not callable(metoda):
+            return metoda
+        return functools.partial(self._izvajalec.poizvedi, metoda)
+
+
+class Asinhrono:
+    """
+    Izvajalec poizvedb modela v bazenu niti.
+    """
+
+    def __init__(self, niti=NITI):
+        """
+        Konstruktor izvajalca z največ niti hkratnimi poizvedbami.
+        """
+        self.bazen = ThreadPoolExecutor(niti, thread_name_prefix="asinhrono")
+        self._v_teku = {}
+        self.Voznik = Razred(self, model.Voznik)
+        self.Ekipa = Razred(self, model.Ekipa)
+        self.Proga = Razred(self, model.Proga)
+        self.Event = Razred(self, model.Event)
+
+    @staticmethod
+    def _poklici(metoda, argumenti):
+        """
+        Pokliče metodo v niti iz bazena in izprazni morebitni generator.
+        """
+        rezultat = metoda(*argumenti)
+        if inspect.isgenerator(rezultat):
+            return tuple(rezultat)
+        return rezultat
+
+    async def poizvedi(self, metoda, *argumenti):
+        """
+        Izvede metodo modela (npr. model.Voznik.poisci_tocke) s podanimi argumenti.
+        Če je enaka poizvedba že v teku, počaka na njen rezultat.
+        Rezultat si lahko deli več klicateljev, zato ga ne spreminjaj.
+        """
+        zanka = asyncio.get_running_loop()
+        kljuc = (zanka, metoda.__module__, metoda.__qualname__, kljuc_argumenta(argumenti))
+        opravilo = self._v_teku.get(kljuc)
+        if opravilo is None:
+            opravilo = zanka.run_in_executor(self.bazen, self._poklici, metoda, argumenti)
+            self._v_teku[kljuc] = opravilo
+            opravilo.add_done_callback(lambda _: self._v_teku.pop(kljuc, None))
+        # preklic enega klicatelja ne sme preklicati poizvedbe za ostale
+        return await asyncio.shield(opravilo)
+
+    def zapri(self):
+        """
+        Počaka na poizvedbe v teku in ustavi bazen niti.
+        """
+        self.bazen.shutdown(wait=True)
+
+
+asinhrono = Asinhrono()
@@ -1,7 +1,19 @@
-import csv
+import hashlib
+import multiprocessing
 import sqlite3
+import time
+
+import numpy as np
+
+import bralnik
 
 PARAM_FMT = ":{}" # za SQLite
+PAKET = 10000  # rezultatov, ki se pri uvozu zapišejo naenkrat
+
+# Zaporedno številko dirke v sezoni hrani stolpec event.krog. Uvoz jo izpelje
+# iz vrstnega reda blokov v datoteki, pri ročno dodanem eventu pa jo poda
+# skrbnik. To je edino mesto, ki določa kronološki vrstni red dirk.
+KRONOLOSKO = "event.krog, event.id"
 
 
 
@@ -12,9 +24,17 @@ class Tabela:
     Polja razreda:
     - ime: ime tabele
     - podatki: ime datoteke s podatki ali None
+    - kljuc: stolpci naravnega ključa, nad katerimi je unikaten indeks
+    - indeksi: seznam parov (ime indeksa, stolpci) za dodatne indekse
+    - posodobi_ob_konfliktu: ali dodajanje obstoječe vrstice vrne njen id
+    - posodobljeni: stolpci, ki jih dodajanje obstoječe vrstice prepiše
     """
     ime = None
     podatki = None
+    kljuc = ()
+    indeksi = []
+    posodobi_ob_konfliktu = True
+    posodobljeni = ()
 
     def __init__(self, conn):
         """
@@ -29,6 +49,85 @@ class Tabela:
         """
         raise NotImplementedError
 
+    def ustvari_indekse(self):
+        """
+        Metoda za ustvarjanje indeksov, če ti še ne obstajajo.
+        """
+        if self.kljuc:
+            stolpci = ", ".join(self.kljuc)
+            # prejšnje različice so ob podvojenih ključih ustvarile navaden
+            # indeks ali pa je imel ključ drugačne stolpce
+            for _, ime, unikaten, *_ in self.conn.execute(f"PRAGMA index_list({self.ime})").fetchall():
+                if ime != f"{self.ime}_kljuc":
+                    continue
+                obstojeci = tuple(stolpec for _, _, stolpec in self.conn.execute(f"PRAGMA index_info({ime})"))
+                if not unikaten or obstojeci != tuple(self.kljuc):
+                    self.conn.execute(f"DROP INDEX {ime};")
+            try:
+                self.conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {self.ime}_kljuc ON {self.ime} ({stolpci});")
+            except sqlite3.IntegrityError:
+                # starejše baze imajo lahko podvojene ključe, ki jih je treba
+                # najprej združiti, sicer UPSERT v dodajanje ne deluje
+                self.zdruzi_podvojene()
+                self.conn.execute(f"CREATE UNIQUE INDEX {self.ime}_kljuc ON {self.ime} ({stolpci});")
+        for ime, stolpci in self.indeksi:
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {ime} ON {self.ime} ({', '.join(stolpci)});")
+
+    def zdruzi_podvojene(self):
+        """
+        Vrstice z enakim naravnim ključem združi v vrstico z najmanjšim id-jem.
+        """
+        stolpci = ", ".join(self.kljuc)
+        podvojene = self.conn.execute(f"""
+            SELECT id, ohranjena FROM (
+                SELECT id, MIN(id) OVER (PARTITION BY {stolpci}) AS ohranjena FROM {self.ime}
+            )
+            WHERE id != ohranjena
+        """).fetchall()
+        for id, ohranjena in podvojene:
+            self.zdruzi(ohranjena, id)
+
+    def zdruzi(self, ohranjena, podvojena):
+        """
+        Sklice na vrstico podvojena preusmeri na vrstico ohranjena in
+        podvojeno vrstico izbriše. Vrstice drugih tabel, ki s tem postanejo
+        podvojene, se združijo na enak način.
+        """
+        for tabela, stolpec in sklici(self.conn, self.ime):
+            otrok = TABELE.get(tabela)
+            if otrok is None or stolpec not in otrok.kljuc:
+                # izpeljane tabele brez naravnega ključa
+                self.conn.execute(f"UPDATE OR IGNORE {tabela} SET {stolpec} = ? WHERE {stolpec} = ?",
+                                  [ohranjena, podvojena])
+                self.conn.execute(f"DELETE FROM {tabela} WHERE {stolpec} = ?", [podvojena])
+                continue
+            ostali = [s for s in otrok.kljuc if s != stolpec]
+            pogoj = "".join(f" AND o.{s} IS p.{s}" for s in ostali)
+            pari = self.conn.execute(f"""
+                SELECT p.id, o.id FROM {tabela} AS p
+                    LEFT JOIN {tabela} AS o ON o.{stolpec} = ?{pogoj}
+                WHERE p.{stolpec} = ?
+            """, [ohranjena, podvojena]).fetchall()
+            for id, obstojeca in pari:
+                if obstojeca is None:
+                    self.conn.execute(f"UPDATE {tabela} SET {stolpec} = ? WHERE id = ?", [ohranjena, id])
+                else:
+                    otrok(self.conn).zdruzi(obstojeca, id)
+        self.conn.execute(f"DELETE FROM {self.ime} WHERE id = ?", [podvojena])
+
+    def obstaja(self):
+        """
+        Vrne, ali tabela v bazi obstaja.
+        """
+        sql = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return self.conn.execute(sql, [self.ime]).fetchone()[0] > 0
+
+    def dopolni(self):
+        """
+        Metoda za dopolnjevanje tabele v obstoječi bazi.
+        """
+        self.ustvari_indekse()
+
     def izbrisi(self):
         """
         Metoda za brisanje tabele.
@@ -49,9 +148,21 @@ class Tabela:
         Argumenti:
         - stolpci: seznam stolpcev
         """
+        konflikt = ""
+        if self.kljuc:
+            if self.posodobi_ob_konfliktu:
+                # posodobitev poskrbi, da RETURNING vrne id obstoječe vrstice;
+                # brez stolpcev za prepis je prazna
+                posodobljeni = [s for s in self.posodobljeni if s in stolpci] or self.kljuc[:1]
+                akcija = "DO UPDATE SET " + ", ".join(f"{s} = excluded.{s}" for s in posodobljeni)
+            else:
+                akcija = "DO NOTHING"
+            konflikt = f"ON CONFLICT ({', '.join(self.kljuc)}) {akcija}"
         return f"""
             INSERT INTO {self.ime} ({", ".join(stolpci)})
-            VALUES ({", ".join(PARAM_FMT.format(s) for s in stolpci)});
+            VALUES ({", ".join(PARAM_FMT.format(s) for s in stolpci)})
+            {konflikt}
+            RETURNING id;
         """
 
     def dodaj_vrstico(self, **podatki):
@@ -64,8 +175,8 @@ class Tabela:
         podatki = {kljuc: vrednost for kljuc, vrednost in podatki.items()
                    if vrednost is not None}
         poizvedba = self.dodajanje(podatki.keys())
-        cur = self.conn.execute(poizvedba, podatki)
-        return cur.lastrowid
+        vrstica = self.conn.execute(poizvedba, podatki).fetchone()
+        return vrstica[0] if vrstica else None
     
 
 class Rezultat(Tabela):
@@ -74,6 +185,13 @@ class Rezultat(Tabela):
     """
     ime = "rezultat"
     podatki = "motogp_rezultati.csv"
+    kljuc = ("event_id", "voznik_id")
+    indeksi = [
+        ("rezultat_event", ("event_id", "mesto")),
+        ("rezultat_voznik", ("voznik_id", "event_id", "mesto", "tocke")),
+        ("rezultat_ekipa", ("ekipa_id", "voznik_id", "tocke")),
+    ]
+    posodobi_ob_konfliktu = False
 
     def ustvari(self):
         """
@@ -90,11 +208,7 @@ class Rezultat(Tabela):
                 cas           INTEGER
             );
         """)
-    
-    def dodaj_vrstico(self, **podatki):
-        rez = self.conn.execute("SELECT id FROM rezultat WHERE event_id= :event_id AND voznik_id = :voznik_id", podatki).fetchone()
-        if rez is None:
-            return super().dodaj_vrstico(**podatki)
+        self.ustvari_indekse()
 
 class Voznik(Tabela):
     """
@@ -102,6 +216,7 @@ class Voznik(Tabela):
     """
     ime = "voznik"
     podatki = "motogp_rezultati.csv"
+    kljuc = ("ime_priimek", )
 
     def ustvari(self):
         """
@@ -113,15 +228,11 @@ class Voznik(Tabela):
                 ime_priimek   TEXT
             );
         """)
+        self.ustvari_indekse()
 
     def dodaj_vrstico(self, **podatki):
         assert "ime_priimek" in podatki
-        rez = self.conn.execute("SELECT id FROM voznik WHERE ime_priimek= :ime_priimek", podatki).fetchone()
-        if rez is None:
-            return super().dodaj_vrstico(**podatki)
-        else:
-            id, = rez
-            return id
+        return super().dodaj_vrstico(**podatki)
 
 class Ekipa(Tabela):
     """
@@ -129,6 +240,7 @@ class Ekipa(Tabela):
     """
     ime = "ekipa"
     podatki = "motogp_rezultati.csv"
+    kljuc = ("ime", )
 
     def ustvari(self):
         """
@@ -140,15 +252,11 @@ class Ekipa(Tabela):
                 ime       TEXT
             );
         """)
+        self.ustvari_indekse()
 
     def dodaj_vrstico(self, **podatki):
         assert "ime" in podatki
-        rez = self.conn.execute("SELECT id FROM ekipa WHERE ime= :ime", podatki).fetchone()
-        if rez is None:
-            return super().dodaj_vrstico(**podatki)
-        else:
-            id, = rez
-            return id
+        return super().dodaj_vrstico(**podatki)
 
 class Event(Tabela):
     """
@@ -156,6 +264,11 @@ class Event(Tabela):
     """
     ime = "event"
     podatki = "motogp_rezultati.csv"
+    kljuc = ("id_proge", "leto")
+    posodobljeni = ("najhitrejsi_cas", )
+    indeksi = [
+        ("event_krog", ("leto", "krog")),
+    ]
 
     def ustvari(self):
         """
@@ -166,18 +279,39 @@ class Event(Tabela):
                 id              INTEGER PRIMARY KEY AUTOINCREMENT,
                 leto            INTEGER,
                 id_proge        INTEGER REFERENCES proga(id),
-                najhitrejsi_cas INTEGER  
+                najhitrejsi_cas INTEGER,
+                krog            INTEGER
             );
         """)
+        self.ustvari_indekse()
 
-    def dodaj_vrstico(self, **podatki):
-        #assert "ime" in podatki
-        rez = self.conn.execute("SELECT id FROM event WHERE id_proge= :id_proge AND leto= :leto AND najhitrejsi_cas= :najhitrejsi_cas", podatki).fetchone()
-        if rez is None:
-            return super().dodaj_vrstico(**podatki)
-        else:
-            id, = rez
-            return id
+    def dopolni(self):
+        """
+        Starejši bazi doda stolpec krog. Strgalnik je dirke sezone zapisoval
+        od zadnje proti prvi, zato se krogi izpeljejo iz padajočih id-jev.
+        """
+        if not any(stolpec[1] == "krog" for stolpec in self.conn.execute("PRAGMA table_info(event)")):
+            self.conn.execute("ALTER TABLE event ADD COLUMN krog INTEGER")
+            self.conn.execute("""
+                UPDATE event SET krog = stevilke.krog
+                FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY leto ORDER BY id DESC) AS krog
+                      FROM event) AS stevilke
+                WHERE stevilke.id = event.id
+            """)
+            self.conn.execute("DROP INDEX IF EXISTS event_leto")
+        super().dopolni()
+
+    def zdruzi_podvojene(self):
+        """
+        Evente z enako progo in letom združi, nato pa na novo izračuna
+        ocene, saj se je vrstni red eventov spremenil.
+        """
+        super().zdruzi_podvojene()
+        ocena = Ocena(self.conn)
+        if ocena.obstaja():
+            ocena.napolni()
+        if Stanje(self.conn).obstaja():
+            povecaj_generacijo(self.conn)
 
 class Proga(Tabela):
     """
@@ -185,6 +319,7 @@ class Proga(Tabela):
     """
     ime = "proga"
     podatki = "motogp_rezultati.csv"
+    kljuc = ("drzava", )
 
     def ustvari(self):
         """
@@ -193,18 +328,446 @@ class Proga(Tabela):
         self.conn.execute("""
             CREATE TABLE proga (
                 id        INTEGER PRIMARY KEY AUTOINCREMENT,
-                drzava    TEXT
+                drzava    TEXT,
+                ime_proge VARCHAR(150)
             );
         """)
+        self.ustvari_indekse()
     
     def dodaj_vrstico(self, **podatki):
         assert "drzava" in podatki
-        rez = self.conn.execute("SELECT id FROM proga WHERE drzava= :drzava", podatki).fetchone()
-        if rez is None:
-            return super().dodaj_vrstico(**podatki)
-        else:
-            id, = rez
-            return id
+        return super().dodaj_vrstico(**podatki)
+
+
+class UvozeniBlok(Tabela):
+    """
+    Tabela z že uvoženimi dirkami iz datotek s podatki.
+    Vsaka dirka (država in leto) ima eno vrstico z zgoščeno vsebino
+    vseh njenih blokov, zato premik bloka v datoteki spremeni le krog eventa.
+    """
+    ime = "uvozeni_blok"
+
+    def ustvari(self):
+        """
+        Ustvari tabelo uvozeni_blok, če ta še ne obstaja.
+        """
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS uvozeni_blok (
+                datoteka  TEXT,
+                drzava    TEXT,
+                leto      INTEGER,
+                zgoscena  TEXT,
+                event_id  INTEGER REFERENCES event(id) ON DELETE SET NULL,
+                PRIMARY KEY (datoteka, drzava, leto)
+            );
+        """)
+
+    def dopolni(self):
+        """
+        Ustvari tabelo, če je še ni. Seznam blokov po odmikih iz prejšnjih
+        različic se zavrže, zato se ob naslednjem uvozu dirke zapišejo na
+        novo pod obstoječimi id-ji eventov.
+        """
+        if any(stolpec[1] == "odmik" for stolpec in self.conn.execute("PRAGMA table_info(uvozeni_blok)")):
+            self.izbrisi()
+        self.ustvari()
+
+
+class Stanje(Tabela):
+    """
+    Tabela z eno vrstico, ki hrani števec sprememb (generacijo) baze
+    in čas zadnje spremembe.
+    """
+    ime = "stanje"
+
+    def ustvari(self):
+        """
+        Ustvari tabelo stanje, če ta še ne obstaja.
+        """
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS stanje (
+                id           INTEGER PRIMARY KEY CHECK (id = 1),
+                generacija   INTEGER,
+                spremenjeno  REAL
+            );
+        """)
+        # začetna generacija je čas v milisekundah, da se števec ob
+        # ponovni gradnji baze ne ponovi
+        self.conn.execute("""
+            INSERT OR IGNORE INTO stanje (id, generacija, spremenjeno)
+            VALUES (1, CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER),
+                    (julianday('now') - 2440587.5) * 86400);
+        """)
+
+    def dopolni(self):
+        """
+        V obstoječi bazi ustvari tabelo stanje, če je še ni.
+        """
+        self.ustvari()
+
+
+def povecaj_generacijo(conn):
+    """
+    Označi, da se je vsebina baze spremenila.
+    """
+    conn.execute("""
+        UPDATE stanje
+        SET generacija = generacija + 1, spremenjeno = (julianday('now') - 2440587.5) * 86400
+        WHERE id = 1;
+    """)
+
+
+class SezonskiPovzetek(Tabela):
+    """
+    Povzetek rezultatov po sezonah za voznike ali ekipe.
+    Sprožilci na tabeli rezultat ga sproti posodabljajo.
+
+    Polja razreda:
+    - stolpec: stolpec tabele rezultat, po katerem se povzema
+    """
+    stolpec = None
+
+    def ustvari(self):
+        """
+        Ustvari tabelo povzetka in sprožilce, ki ga ohranjajo ažurnega.
+        """
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.ime} (
+                {self.stolpec}   INTEGER,
+                leto             INTEGER,
+                tocke            INTEGER,
+                nastopi          INTEGER,
+                zmage            INTEGER,
+                stopnicke        INTEGER,
+                najboljse_mesto  INTEGER,
+                PRIMARY KEY ({self.stolpec}, leto)
+            ) WITHOUT ROWID;
+        """)
+        # nova vrstica le prišteje svoj prispevek
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.ime}_vstavi AFTER INSERT ON rezultat
+            BEGIN
+                INSERT INTO {self.ime}
+                SELECT NEW.{self.stolpec}, event.leto, COALESCE(NEW.tocke, 0), 1,
+                       COALESCE(NEW.mesto = 1, 0), COALESCE(NEW.mesto IN (1, 2, 3), 0), NEW.mesto
+                FROM event WHERE event.id = NEW.event_id
+                ON CONFLICT ({self.stolpec}, leto) DO UPDATE SET
+                    tocke = tocke + excluded.tocke,
+                    nastopi = nastopi + 1,
+                    zmage = zmage + excluded.zmage,
+                    stopnicke = stopnicke + excluded.stopnicke,
+                    najboljse_mesto = COALESCE(MIN(najboljse_mesto, excluded.najboljse_mesto),
+                                               najboljse_mesto, excluded.najboljse_mesto);
+            END;
+        """)
+        # pri brisanju in spremembi se prizadeta sezona izračuna na novo,
+        # saj najboljšega mesta ni mogoče odšteti
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.ime}_izbrisi AFTER DELETE ON rezultat
+            BEGIN
+                {self.preracunaj("OLD")}
+            END;
+        """)
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.ime}_posodobi
+            AFTER UPDATE OF event_id, voznik_id, ekipa_id, mesto, tocke ON rezultat
+            BEGIN
+                {self.preracunaj("OLD")}
+                {self.preracunaj("NEW")}
+            END;
+        """)
+
+    def preracunaj(self, vrstica):
+        """
+        Vrne stavke, ki na novo izračunajo sezono, v kateri je podana
+        vrstica sprožilca (OLD ali NEW).
+        """
+        leto = f"(SELECT leto FROM event WHERE id = {vrstica}.event_id)"
+        return f"""
+                DELETE FROM {self.ime}
+                WHERE {self.stolpec} = {vrstica}.{self.stolpec} AND leto = {leto};
+                INSERT INTO {self.ime}
+                SELECT {self.stolpec}, event.leto, COALESCE(SUM(tocke), 0), COUNT(*),
+                       COALESCE(SUM(mesto = 1), 0), COALESCE(SUM(mesto IN (1, 2, 3)), 0), MIN(mesto)
+                FROM rezultat
+                    JOIN event ON event.id = rezultat.event_id
+                WHERE {self.stolpec} = {vrstica}.{self.stolpec} AND event.leto = {leto}
+                GROUP BY {self.stolpec}, event.leto;
+        """
+
+    def napolni(self):
+        """
+        Povzetek izračuna na novo iz vseh rezultatov.
+        """
+        self.conn.execute(f"DELETE FROM {self.ime};")
+        self.conn.execute(f"""
+            INSERT INTO {self.ime}
+            SELECT {self.stolpec}, event.leto, COALESCE(SUM(tocke), 0), COUNT(*),
+                   COALESCE(SUM(mesto = 1), 0), COALESCE(SUM(mesto IN (1, 2, 3)), 0), MIN(mesto)
+            FROM rezultat
+                JOIN event ON event.id = rezultat.event_id
+            GROUP BY {self.stolpec}, event.leto;
+        """)
+
+    def dopolni(self):
+        """
+        V obstoječi bazi ustvari in napolni povzetek, če ga še ni.
+        """
+        if not self.obstaja():
+            self.ustvari()
+            self.napolni()
+
+
+class VoznikSezona(SezonskiPovzetek):
+    """
+    Tabela s točkami, nastopi, zmagami in stopničkami voznikov po sezonah.
+    """
+    ime = "voznik_sezona"
+    stolpec = "voznik_id"
+
+
+class EkipaSezona(SezonskiPovzetek):
+    """
+    Tabela s točkami, nastopi, zmagami in stopničkami ekip po sezonah.
+    """
+    ime = "ekipa_sezona"
+    stolpec = "ekipa_id"
+
+
+class Iskanje(Tabela):
+    """
+    Iskalni indeks FTS5 nad besedilnimi stolpci druge tabele.
+    Sprožilci na izvorni tabeli ga sproti posodabljajo.
+
+    Polja razreda:
+    - vir: ime izvorne tabele
+    - stolpci: seznam iskanih stolpcev izvorne tabele
+    """
+    vir = None
+    stolpci = []
+
+    def ustvari(self):
+        """
+        Ustvari iskalni indeks in sprožilce, ki ga ohranjajo ažurnega.
+        """
+        stolpci = ", ".join(self.stolpci)
+        novi = ", ".join(f"NEW.{s}" for s in self.stolpci)
+        stari = ", ".join(f"OLD.{s}" for s in self.stolpci)
+        # remove_diacritics 2 poskrbi, da "marquez" najde tudi "Márquez"
+        self.conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.ime} USING fts5 (
+                {stolpci},
+                content = '{self.vir}',
+                content_rowid = 'id',
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.ime}_vstavi AFTER INSERT ON {self.vir}
+            BEGIN
+                INSERT INTO {self.ime} (rowid, {stolpci}) VALUES (NEW.id, {novi});
+            END;
+        """)
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.ime}_izbrisi AFTER DELETE ON {self.vir}
+            BEGIN
+                INSERT INTO {self.ime} ({self.ime}, rowid, {stolpci}) VALUES ('delete', OLD.id, {stari});
+            END;
+        """)
+        self.conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {self.ime}_posodobi AFTER UPDATE OF {stolpci} ON {self.vir}
+            BEGIN
+                INSERT INTO {self.ime} ({self.ime}, rowid, {stolpci}) VALUES ('delete', OLD.id, {stari});
+                INSERT INTO {self.ime} (rowid, {stolpci}) VALUES (NEW.id, {novi});
+            END;
+        """)
+
+    def napolni(self):
+        """
+        Indeks zgradi na novo iz izvorne tabele.
+        """
+        self.conn.execute(f"INSERT INTO {self.ime} ({self.ime}) VALUES ('rebuild');")
+
+    def dopolni(self):
+        """
+        V obstoječi bazi ustvari in napolni iskalni indeks, če ga še ni.
+        """
+        if not self.obstaja():
+            self.ustvari()
+            self.napolni()
+
+
+class VoznikIskanje(Iskanje):
+    """
+    Iskalni indeks imen voznikov.
+    """
+    ime = "voznik_iskanje"
+    vir = "voznik"
+    stolpci = ["ime_priimek"]
+
+
+class EkipaIskanje(Iskanje):
+    """
+    Iskalni indeks imen ekip.
+    """
+    ime = "ekipa_iskanje"
+    vir = "ekipa"
+    stolpci = ["ime"]
+
+
+class ProgaIskanje(Iskanje):
+    """
+    Iskalni indeks imen prog in držav.
+    """
+    ime = "proga_iskanje"
+    vir = "proga"
+    stolpci = ["ime_proge", "drzava"]
+
+
+ZACETNA_OCENA = 1500
+FAKTOR_OCENE = 32
+
+
+def spremembe_ocen(ocene, mesta):
+    """
+    Vrne spremembe ocen Elo uvrščenih voznikov enega eventa.
+    Vsak voznik se primerja z vsakim drugim: zmaga proti nekomu, ki je
+    za njim, šteje 1, enako mesto 0,5 in poraz 0. Vsota razlik med
+    dejanskim in pričakovanim izidom se deli s številom nasprotnikov.
+    """
+    if len(ocene) < 2:
+        return np.zeros(len(ocene))
+    pricakovano = 1 / (1 + 10 ** ((ocene[None, :] - ocene[:, None]) / 400))
+    dejansko = (mesta[:, None] < mesta[None, :]) + 0.5 * (mesta[:, None] == mesta[None, :])
+    # primerjava voznika s samim seboj prispeva 0,5 - 0,5
+    return FAKTOR_OCENE / (len(ocene) - 1) * (dejansko - pricakovano).sum(axis=1)
+
+
+class Ocena(Tabela):
+    """
+    Zgodovina ocen Elo voznikov. Eventi se obdelajo v kronološkem vrstnem
+    redu, za vsakega uvrščenega voznika pa se hrani ocena po eventu in
+    njena sprememba. Zaporedje je zaporedna številka eventa v kronološkem
+    vrstnem redu vseh eventov, zato je zgodovina voznika en obseg ključa.
+    """
+    ime = "ocena"
+    indeksi = [
+        ("ocena_zaporedje", ("zaporedje", )),
+        ("ocena_event", ("event_id", )),
+    ]
+
+    def ustvari(self):
+        """
+        Ustvari tabelo ocena, če ta še ne obstaja.
+        """
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocena (
+                voznik_id  INTEGER REFERENCES voznik(id),
+                zaporedje  INTEGER,
+                event_id   INTEGER REFERENCES event(id),
+                ocena      REAL,
+                sprememba  REAL,
+                PRIMARY KEY (voznik_id, zaporedje)
+            ) WITHOUT ROWID;
+        """)
+        self.ustvari_indekse()
+
+    def napolni(self):
+        """
+        Zgodovino ocen izračuna na novo iz vseh rezultatov.
+        """
+        self.preracunaj_od(0)
+
+    def dopolni(self):
+        """
+        V obstoječi bazi ustvari in napolni zgodovino ocen, če je še ni.
+        """
+        if not self.obstaja():
+            self.ustvari()
+            self.napolni()
+
+    def uporabi(self, eventi, izbrisani=()):
+        """
+        Posodobi ocene po dodanih, spremenjenih ali izbrisanih eventih.
+        Ocene se izračunajo na novo od najzgodnejšega od podanih eventov
+        naprej, zato se nov zadnji event obdela sam. Eventi iz izbrisani se
+        pri tem izpustijo iz vrstnega reda, klicatelj pa jih izbriše za tem,
+        zato zaporedje ocen ostane enako mestu eventa v vrstnem redu.
+        Vrne množico id-jev voznikov, katerih zgodovina se je spremenila.
+        """
+        izbrisani = set(izbrisani)
+        vrstni_red = self.vrstni_red()
+        polozaji = {id: i for i, id in enumerate(vrstni_red)}
+        zacetki = []
+        for event_id in set(eventi) | izbrisani:
+            if event_id in polozaji:
+                zacetki.append(polozaji[event_id])
+            # izbrisan ali premaknjen event ima v zgodovini še nekdanje mesto,
+            # za katerim se je vrstni red eventov spremenil
+            zacetki.extend(zaporedje for zaporedje, in self.conn.execute(
+                "SELECT MIN(zaporedje) FROM ocena WHERE event_id = ?", [event_id]) if zaporedje is not None)
+        if not zacetki:
+            return set()
+        # pred najzgodnejšim mestom ni nobenega izbrisanega eventa, zato se mesta tam ne spremenijo
+        return self.preracunaj_od(min(zacetki), [id for id in vrstni_red if id not in izbrisani])
+
+    def vrstni_red(self):
+        """
+        Vrne id-je vseh eventov v kronološkem vrstnem redu.
+        """
+        return [id for id, in self.conn.execute(f"SELECT id FROM event ORDER BY event.leto, {KRONOLOSKO}")]
+
+    def preracunaj_od(self, zacetek, vrstni_red=None):
+        """
+        Izbriše ocene od danega zaporedja naprej in jih izračuna na novo,
+        začenši z ocenami voznikov pred tem zaporedjem.
+        Vrne množico id-jev voznikov, katerih zgodovina se je spremenila.
+        """
+        if vrstni_red is None:
+            vrstni_red = self.vrstni_red()
+        spremenjeni = {voznik_id for voznik_id, in self.conn.execute(
+            "SELECT DISTINCT voznik_id FROM ocena WHERE zaporedje >= ?", [zacetek])}
+        self.conn.execute("DELETE FROM ocena WHERE zaporedje >= ?", [zacetek])
+
+        trenutne = {}
+        vrstice = []
+        for zaporedje in range(zacetek, len(vrstni_red)):
+            event_id = vrstni_red[zaporedje]
+            uvrsceni = self.conn.execute(
+                "SELECT voznik_id, mesto FROM rezultat WHERE event_id = ? AND mesto > 0", [event_id]).fetchall()
+            if not uvrsceni:
+                continue
+            for voznik_id, _ in uvrsceni:
+                if voznik_id not in trenutne:
+                    zadnja = self.conn.execute("""
+                        SELECT ocena FROM ocena WHERE voznik_id = ?
+                        ORDER BY zaporedje DESC LIMIT 1
+                    """, [voznik_id]).fetchone()
+                    trenutne[voznik_id] = zadnja[0] if zadnja else ZACETNA_OCENA
+            vozniki = [voznik_id for voznik_id, _ in uvrsceni]
+            ocene = np.array([trenutne[voznik_id] for voznik_id in vozniki], dtype=np.float64)
+            spremembe = spremembe_ocen(ocene, np.array([mesto for _, mesto in uvrsceni]))
+            for voznik_id, ocena, sprememba in zip(vozniki, (ocene + spremembe).tolist(), spremembe.tolist()):
+                trenutne[voznik_id] = ocena
+                vrstice.append((voznik_id, zaporedje, event_id, ocena, sprememba))
+
+        self.conn.executemany("""
+            INSERT INTO ocena (voznik_id, zaporedje, event_id, ocena, sprememba)
+            VALUES (?, ?, ?, ?, ?)
+        """, vrstice)
+        return spremenjeni | trenutne.keys()
+
+
+# razredi tabel z naravnim ključem po imenu tabele
+TABELE = {razred.ime: razred for razred in (Rezultat, Voznik, Ekipa, Event, Proga)}
+
+
+def sklici(conn, tabela):
+    """
+    Vrne seznam parov (tabela, stolpec) tujih ključev, ki kažejo na dano tabelo.
+    """
+    return [(ime, sklic[3]) for ime, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            for sklic in conn.execute(f"PRAGMA foreign_key_list({ime})") if sklic[2] == tabela]
 
 
 def ustvari_tabele(tabele):
@@ -231,14 +794,26 @@ def izprazni_tabele(tabele):
         t.izprazni()
 
 
-def ustvari_bazo(conn):
+def ustvari_bazo(conn, datoteke=("motogp_rezultati.csv", )):
     """
     Izvede ustvarjanje baze.
+    Ena datoteka se uvozi sprotno, več datotek pa vzporedno.
+    Vrne število uvoženih vrstic in porabljen čas v sekundah.
     """
     tabele = pripravi_tabele(conn)
     izbrisi_tabele(tabele)
-    ustvari_tabele(tabele)
-    uvozi_podatke(tabele)
+    # povzetki, iskalni indeksi in ocene se ustvarijo šele po uvozu,
+    # da sprožilci ne tečejo za vsako vrstico in se ocene izračunajo enkrat
+    povzetki = [t for t in tabele if isinstance(t, (SezonskiPovzetek, Iskanje, Ocena))]
+    ustvari_tabele([t for t in tabele if t not in povzetki])
+    if len(datoteke) == 1:
+        st_vrstic, trajanje = uvozi_sprotno(tabele, datoteke[0])
+    else:
+        st_vrstic, trajanje = uvozi_datoteke(tabele, datoteke)
+    with conn:
+        for t in povzetki:
+            t.dopolni()
+    return st_vrstic, trajanje
 
 
 def pripravi_tabele(conn):
@@ -250,62 +825,307 @@ def pripravi_tabele(conn):
     ekipa = Ekipa(conn)
     event = Event(conn)
     proga = Proga(conn)
-    return [rezultat, voznik, ekipa, event, proga]
+    uvozeni_blok = UvozeniBlok(conn)
+    stanje = Stanje(conn)
+    voznik_sezona = VoznikSezona(conn)
+    ekipa_sezona = EkipaSezona(conn)
+    voznik_iskanje = VoznikIskanje(conn)
+    ekipa_iskanje = EkipaIskanje(conn)
+    proga_iskanje = ProgaIskanje(conn)
+    ocena = Ocena(conn)
+    return [rezultat, voznik, ekipa, event, proga, uvozeni_blok, stanje, voznik_sezona, ekipa_sezona,
+            voznik_iskanje, ekipa_iskanje, proga_iskanje, ocena]
+
+
+def dopolni_bazo(conn):
+    """
+    Obstoječi bazi doda manjkajoče indekse in tabele.
+    """
+    for t in pripravi_tabele(conn):
+        t.dopolni()
 
 
 def ustvari_bazo_ce_ne_obstaja(conn):
     """
-    Ustvari bazo, če ta še ne obstaja.
+    Ustvari bazo, če ta še ne obstaja, sicer jo dopolni.
     """
     with conn:
         cur = conn.execute("SELECT COUNT(*) FROM sqlite_master")
         if cur.fetchone() == (0, ):
             ustvari_bazo(conn)
+        else:
+            dopolni_bazo(conn)
         
-def uvozi_podatke(tabele, datoteka="motogp_rezultati.csv"):
-    """uvozi vse podatke iz datoteke"""
-
-    rezultat_tabela = tabele[0]
-    voznik_tabela = tabele[1]
-    ekipa_tabela = tabele[2]
-    event_tabela = tabele[3]
-    proga_tabela = tabele[4]
-
-    with open(datoteka, "r", encoding='utf-8') as dat:
-        leto = 0
-        drzava = ""
-        ime_priimek = ""
-        for vrstica in dat:
-            podatki = vrstica.strip().split(",")
-
-            if podatki[0] == "@":
-                drzava = podatki[2]
-                leto = podatki[3]
-                podatki_proga = {"drzava" : drzava}
+def uvozi_datoteke(tabele, datoteke, st_procesov=None):
+    """
+    Vzporedno uvozi več datotek s podatki.
 
-            else:
-                if podatki[0] == '1': #ker prva vrstica ima najhitrejsi cas
-                    mesto, tocke, ime_priimek, ekipa, cas = podatki
+    Datoteke se razčlenijo v skupini procesov, dirke pa se nato v enem
+    prehodu zapišejo v bazo. Id-je voznikov, ekip, prog in eventov tako
+    dodeljuje le en pisalec in so enotni za vse datoteke.
+    Vrne število uvoženih vrstic in porabljen čas v sekundah.
+    """
+    zacetek = time.perf_counter()
+    conn = tabele[0].conn
+    with multiprocessing.Pool(st_procesov) as skupina, conn:
+        pred = conn.total_changes
+        zapisane = []
 
-                    proga_id = proga_tabela.dodaj_vrstico(**podatki_proga)
-                    podatki_eventa = {"leto" : leto, "id_proge" : proga_id, "najhitrejsi_cas" : cas}
+        def dirke():
+            # imap ohrani vrstni red datotek, zato so id-ji vedno enaki
+            for dirke_datoteke in skupina.imap(bralnik.preberi_vse, datoteke):
+                for dirka in dirke_datoteke:
+                    zapisane.append(dirka[0])
+                    yield dirka
 
-                else:
-                    mesto, tocke, ime_priimek, ekipa, cas = podatki
-                  
+        st_vrstic, id_eventov = zapisi_dirke(tabele, dirke())
+        krogi = stevilke_krogov(zapisane)
+        zapisi_kroge(conn, {event_id: krogi[dirka] for dirka, event_id in zip(zapisane, id_eventov)
+                            if event_id is not None})
+        if conn.total_changes != pred:
+            povecaj_generacijo(conn)
+    return st_vrstic, time.perf_counter() - zacetek
+
+
+def zapisi_dirke(tabele, dirke):
+    """
+    Zapiše pare (Dirka, seznam uvrstitev) v bazo.
+
+    Proge, ekipe, vozniki in eventi se razrešijo v slovarjih v pomnilniku,
+    nove vrstice pa se zapisujejo s klici executemany po največ PAKET
+    rezultatov, zato poraba pomnilnika ni odvisna od števila dirk. Event
+    je določen s progo in letom, zato dirka, ki je že v bazi, ohrani svoj
+    id, njen najhitrejši čas pa se posodobi. Za transakcijo in generacijo
+    baze poskrbi klicatelj.
+    Vrne število dodanih rezultatov in seznam id-jev eventov za vsak blok.
+    """
+    conn = tabele[0].conn
+
+    # že obstoječe vrstice, da uvoz deluje tudi nad neprazno bazo
+    proge = dict(conn.execute("SELECT drzava, id FROM proga"))
+    ekipe = dict(conn.execute("SELECT ime, id FROM ekipa"))
+    vozniki = dict(conn.execute("SELECT ime_priimek, id FROM voznik"))
+    eventi = {(id_proge, leto): id for id_proge, leto, id in
+              conn.execute("SELECT id_proge, leto, MIN(id) FROM event GROUP BY id_proge, leto")}
+    obstojeci_eventi = set(eventi.values())
+    casi_eventov = {}
+
+    nove_proge, nove_ekipe, novi_vozniki, novi_eventi, novi_rezultati = [], [], [], [], []
+    id_eventov = []
+
+    naslednji_id = {}
+    for tabela in ("proga", "ekipa", "voznik", "event"):
+        najvecji, = conn.execute(f"SELECT MAX(id) FROM {tabela}").fetchone()
+        naslednji_id[tabela] = (najvecji or 0) + 1
+
+    def razresi(slovar, kljuc, novi, tabela):
+        id = slovar.get(kljuc)
+        if id is None:
+            id = slovar[kljuc] = naslednji_id[tabela]
+            naslednji_id[tabela] += 1
+            novi.append((id, ) + (kljuc if isinstance(kljuc, tuple) else (kljuc, )))
+        return id
+
+    st_rezultatov = 0
+
+    def zapisi():
+        nonlocal st_rezultatov
+        conn.executemany("INSERT INTO proga (id, drzava) VALUES (?, ?)", nove_proge)
+        conn.executemany("INSERT INTO ekipa (id, ime) VALUES (?, ?)", nove_ekipe)
+        conn.executemany("INSERT INTO voznik (id, ime_priimek) VALUES (?, ?)", novi_vozniki)
+        conn.executemany("INSERT INTO event (id, id_proge, leto, najhitrejsi_cas) VALUES (?, ?, ?, ?)", novi_eventi)
+        cur = conn.executemany("""
+            INSERT INTO rezultat (event_id, voznik_id, ekipa_id, mesto, tocke, cas)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (event_id, voznik_id) DO NOTHING
+        """, novi_rezultati)
+        st_rezultatov += cur.rowcount
+        for novi in (nove_proge, nove_ekipe, novi_vozniki, novi_eventi, novi_rezultati):
+            novi.clear()
+
+    for (drzava, leto), uvrstitve in dirke:
+        event_id = None
+        for mesto, tocke, ime_priimek, ekipa, cas in uvrstitve:
+            if mesto == 1: #ker prva vrstica ima najhitrejsi cas
+                proga_id = razresi(proge, drzava, nove_proge, "proga")
+                event_id = eventi.get((proga_id, leto))
+                if event_id is None:
+                    event_id = eventi[proga_id, leto] = naslednji_id["event"]
+                    naslednji_id["event"] += 1
+                    novi_eventi.append((event_id, proga_id, leto, cas))
+                # pri podvojenih blokih ene dirke velja prvi, kot pri rezultatih
+                casi_eventov.setdefault(event_id, cas)
+            if event_id is None:
+                continue
+
+            ekipa_id = razresi(ekipe, ekipa, nove_ekipe, "ekipa")
+            voznik_id = razresi(vozniki, ime_priimek, novi_vozniki, "voznik")
+            novi_rezultati.append((event_id, voznik_id, ekipa_id, mesto, tocke, cas))
+        id_eventov.append(event_id)
+        if len(novi_rezultati) >= PAKET:
+            zapisi()
+
+    zapisi()
+    conn.executemany("UPDATE event SET najhitrejsi_cas = ? WHERE id = ? AND najhitrejsi_cas IS NOT ?",
+                     [(cas, id, cas) for id, cas in casi_eventov.items() if id in obstojeci_eventi])
+
+    return st_rezultatov, id_eventov
+
+
+def stevilke_krogov(dirke):
+    """
+    Vrne slovar {Dirka: krog} za dirke v vrstnem redu blokov datoteke.
+    Strgalnik zapisuje dirke sezone od zadnje proti prvi, zato ima prva
+    dirka sezone v datoteki najvišjo številko kroga.
+    """
+    sezone = {}
+    for dirka in dirke:
+        sezona = sezone.setdefault(dirka.leto, {})
+        sezona.setdefault(dirka, len(sezona))
+    return {dirka: len(sezona) - i for sezona in sezone.values() for dirka, i in sezona.items()}
+
+
+def zapisi_kroge(conn, krogi):
+    """
+    Eventom zapiše številke krogov iz slovarja {id eventa: krog}.
+    Vrne seznam id-jev eventov, katerih krog se je spremenil.
+    """
+    stari = dict(conn.execute("SELECT id, krog FROM event"))
+    premaknjeni = [id for id, krog in krogi.items() if id in stari and stari[id] != krog]
+    conn.executemany("UPDATE event SET krog = ? WHERE id = ?", [(krogi[id], id) for id in premaknjeni])
+    return premaknjeni
+
+
+def razdeli_na_bloke(dat):
+    """
+    Binarno datoteko razdeli na bloke dirk.
+    Vrača pare (Dirka iz glave bloka, vrstice bloka).
+    """
+    vrstice = None
+    for vrstica in dat:
+        if vrstica.startswith(b"@,"):
+            if vrstice is not None:
+                yield dirka, vrstice
+            dirka = bralnik.razcleni_glavo(vrstica.decode("utf-8").rstrip("\r\n").split(","))
+            vrstice = []
+        if vrstice is not None:
+            vrstice.append(vrstica)
+    if vrstice is not None:
+        yield dirka, vrstice
+
+
+def uvozi_sprotno(tabele, datoteka="motogp_rezultati.csv"):
+    """
+    Uvozi le nove ali spremenjene dirke iz datoteke.
+
+    Za vsako uvoženo dirko (državo in leto) se v tabeli uvozeni_blok hrani
+    zgoščena vsebine vseh njenih blokov. Rezultati spremenjene dirke se
+    zapišejo na novo pod obstoječim eventom, dirke, ki jih v datoteki ni
+    več, pa se izbrišejo. Ocene voznikov se posodobijo le od prvega
+    spremenjenega eventa naprej. Neprazna baza brez seznama uvoženih dirk
+    se poveže z dirkami iz datoteke po državi in letu; če se nobena ne
+    ujema, se sproži ValueError.
+    Vrne število uvoženih vrstic in porabljen čas v sekundah.
+    """
+    conn = tabele[0].conn
+    zacetek = time.perf_counter()
+    UvozeniBlok(conn).dopolni()
+
+    znani = {(drzava, leto): (zgoscena, event_id) for drzava, leto, zgoscena, event_id in conn.execute(
+        "SELECT drzava, leto, zgoscena, event_id FROM uvozeni_blok WHERE datoteka = ?", [datoteka])}
+
+    # prvi prehod: bloki ene dirke se lahko ponovijo, zato se zgoščena računa čez vse
+    zgoscene = {}
+    with bralnik.odpri(datoteka, "rb") as dat:
+        for dirka, vrstice in razdeli_na_bloke(dat):
+            zgoscene.setdefault(dirka, hashlib.sha1()).update(b"".join(vrstice))
+    zgoscene = {dirka: zgoscena.hexdigest() for dirka, zgoscena in zgoscene.items()}
+
+    brez_seznama = conn.execute("SELECT 1 FROM uvozeni_blok LIMIT 1").fetchone() is None
+    if brez_seznama and conn.execute("SELECT 1 FROM event LIMIT 1").fetchone():
+        # baza je bila zgrajena brez seznama uvoženih dirk, zato se dirke
+        # povežejo z obstoječimi eventi po državi in letu in zapišejo na novo
+        obstojeci = {(drzava, leto): id for drzava, leto, id in conn.execute("""
+            SELECT proga.drzava, event.leto, MIN(event.id) FROM event
+                JOIN proga ON proga.id = event.id_proge
+            GROUP BY proga.drzava, event.leto
+        """)}
+        znani = {dirka: (None, obstojeci[dirka]) for dirka in zgoscene if dirka in obstojeci}
+        if not znani:
+            raise ValueError(f"Nobena dirka iz {datoteka} se ne ujema z eventi v bazi, "
+                             "zato je treba bazo zgraditi na novo (python baza.py).")
+
+    spremenjene = {dirka for dirka, zgoscena in zgoscene.items()
+                   if dirka not in znani or znani[dirka][0] != zgoscena}
+    izginule = [dirka for dirka in znani if dirka not in zgoscene]
+    # eventi, katerih stari rezultati se izbrišejo
+    prepisani = [znani[dirka][1] for dirka in spremenjene if dirka in znani and znani[dirka][1] is not None]
+    izbrisani = [znani[dirka][1] for dirka in izginule if znani[dirka][1] is not None]
+
+    with conn, bralnik.odpri(datoteka, "rb") as dat:
+        pred = conn.total_changes
+        conn.executemany("DELETE FROM uvozeni_blok WHERE datoteka = ? AND drzava = ? AND leto = ?",
+                         [(datoteka, *dirka) for dirka in izginule])
+        conn.executemany("DELETE FROM rezultat WHERE event_id = ?", [(id, ) for id in prepisani + izbrisani])
+
+        # drugi prehod: bloki spremenjenih dirk se zapisujejo sproti, ko se preberejo
+        zapisane = []
+
+        def dirke():
+            for dirka, vrstice in razdeli_na_bloke(dat):
+                if dirka in spremenjene:
+                    zapisane.append(dirka)
+                    yield from bralnik.beri_dirke(vrstica.decode("utf-8") for vrstica in vrstice)
+
+        st_vrstic, id_eventov = zapisi_dirke(tabele, dirke())
+        eventi_dirk = {}
+        for dirka, event_id in zip(zapisane, id_eventov):
+            if eventi_dirk.get(dirka) is None:
+                eventi_dirk[dirka] = event_id
+        conn.executemany("""
+            INSERT OR REPLACE INTO uvozeni_blok (datoteka, drzava, leto, zgoscena, event_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(datoteka, *dirka, zgoscene[dirka], eventi_dirk.get(dirka)) for dirka in spremenjene])
+
+        # vrstni red blokov določa kroge vseh dirk v datoteki, tudi nespremenjenih
+        krogi = stevilke_krogov(zgoscene)
+        eventi_datoteke = {dirka: eventi_dirk[dirka] if dirka in eventi_dirk else znani[dirka][1]
+                           for dirka in zgoscene}
+        premaknjeni = zapisi_kroge(conn, {event_id: krogi[dirka] for dirka, event_id in eventi_datoteke.items()
+                                          if event_id is not None})
 
-                podatki_voznik = {"ime_priimek" : ime_priimek}                        
-                podatki_ekipa = {"ime" : ekipa}
+        # pri gradnji baze se ocene izračunajo šele po uvozu
+        ocena = Ocena(conn)
+        if ocena.obstaja():
+            ocena.uporabi(prepisani + list(eventi_dirk.values()) + premaknjeni, izbrisani)
+        conn.executemany("DELETE FROM event WHERE id = ?", [(id, ) for id in izbrisani])
+        # nespremenjena datoteka ne sme razveljaviti predpomnilnikov
+        if conn.total_changes != pred:
+            povecaj_generacijo(conn)
 
-                ekipa_id = ekipa_tabela.dodaj_vrstico(**podatki_ekipa)
-                event_id = event_tabela.dodaj_vrstico(**podatki_eventa)
-                voznik_id = voznik_tabela.dodaj_vrstico(**podatki_voznik)
+    return st_vrstic, time.perf_counter() - zacetek
 
-                podatki_rezultat = {"event_id" : event_id, "voznik_id" : voznik_id, "ekipa_id" : ekipa_id, "mesto" : mesto, "tocke" : tocke, "cas" : cas}
-                rezultat_tabela.dodaj_vrstico(**podatki_rezultat)
 
-if __name__ == "__main__":        
+if __name__ == "__main__":
     import os
-    os.remove("baza.db")
-conn = sqlite3.connect("baza.db", timeout=10)
-ustvari_bazo_ce_ne_obstaja(conn)
\ No newline at end of file
+    import sys
+    datoteke = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--sprotno" in sys.argv:
+        # doda le nove bloke, baza med uvozom ostane na voljo
+        conn = sqlite3.connect("baza.db", timeout=10)
+        ustvari_bazo_ce_ne_obstaja(conn)
+        tabele = pripravi_tabele(conn)
+        st_vrstic, trajanje = 0, 0
+        for datoteka in datoteke or ["motogp_rezultati.csv"]:
+            try:
+                st, cas = uvozi_sprotno(tabele, datoteka)
+            except ValueError as napaka:
+                sys.exit(str(napaka))
+            st_vrstic, trajanje = st_vrstic + st, trajanje + cas
+    else:
+        if os.path.exists("baza.db"):
+            os.remove("baza.db")
+        conn = sqlite3.connect("baza.db", timeout=10)
+        # python baza.py [sezona1.csv sezona2.csv.gz ...]
+        st_vrstic, trajanje = ustvari_bazo(conn, datoteke or ["motogp_rezultati.csv"])
+    print(f"Uvoženih {st_vrstic} rezultatov v {trajanje:.3f} s ({st_vrstic / trajanje:.0f} vrstic/s).")
@@ -0,0 +1,251 @@
+"""
+Merjenje hitrosti uvoza in poizvedb nad umetno ustvarjenimi podatki.
+
+Uporaba:
+    python benchmark.py [faktor ...] [izhod.json]
+
+Privzeto se meri pri faktorjih 1, 10 in 100 (1x je približno velikost
+datoteke motogp_rezultati.csv), rezultati pa se zapišejo v benchmark.json.
+"""
+import inspect
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import baza
+import model
+import stolpci
+from povezava import povezave
+
+DRZAVE = ["mal", "tha", "aus", "jpn", "ina", "emi", "rsm", "ara", "aut", "gbr",
+          "ger", "ned", "ita", "cat", "fra", "spa", "ame", "por", "qat"]
+TOCKE = [25, 20, 16, 13, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1]
+
+# velikosti podatkov glede na faktor: (sezone, kategorije)
+VELIKOSTI = {1: (3, 1), 10: (10, 3), 100: (50, 6)}
+PONOVITVE = 20
+
+
+def generiraj(datoteka, sezone=3, dirke=19, vozniki=22, kategorije=1, seme=0, prvo_leto=2024):
+    """
+    V datoteko zapiše umetne rezultate v obliki motogp_rezultati.csv.
+    Vrne število zapisanih uvrstitev.
+    """
+    nakljucno = random.Random(seme)
+    st_vrstic = 0
+    with open(datoteka, "w", encoding="utf-8", newline="") as dat:
+        for leto in range(prvo_leto, prvo_leto - sezone, -1):
+            for drzava in (DRZAVE * (dirke // len(DRZAVE) + 1))[:dirke]:
+                for kategorija in range(kategorije):
+                    # dirka je določena z državo in letom, zato ima vsaka kategorija svojo oznako
+                    oznaka = f"{drzava}{kategorija}" if kategorija else drzava
+                    print(f"@,dirka,{oznaka},{leto}", file=dat)
+                    cas = nakljucno.uniform(2200, 2700)
+                    razvrstitev = nakljucno.sample(range(vozniki), vozniki)
+                    for mesto, voznik in enumerate(razvrstitev, 1):
+                        tocke = TOCKE[mesto - 1] if mesto <= len(TOCKE) else 0
+                        ime = f"V{kategorija}. Voznik{voznik}"
+                        ekipa = f"EKIPA {kategorija}-{voznik // 2}"
+                        print(f"{mesto},{tocke},{ime},{ekipa},{cas:.3f}", file=dat)
+                        cas += nakljucno.uniform(0.1, 3)
+                        st_vrstic += 1
+    return st_vrstic
+
+
+def izmeri(funkcija, ponovitve=PONOVITVE):
+    """
+    Vrne mediano časa enega klica funkcije v milisekundah.
+    Generatorji se v celoti izpraznijo.
+    """
+    casi = []
+    for _ in range(ponovitve):
+        zacetek = time.perf_counter()
+        rezultat = funkcija()
+        if inspect.isgenerator(rezultat):
+            list(rezultat)
+        casi.append((time.perf_counter() - zacetek) * 1000)
+    return statistics.median(casi)
+
+
+def vzorci(conn, modul=model):
+    """
+    Vrne po en značilen objekt vsakega razreda iz modula (model ali stolpci)
+    in vrednosti argumentov za statične metode.
+    """
+    (voznik_id, ime_priimek), (drugi_id, drugo_ime) = conn.execute("""
+        SELECT voznik.id, voznik.ime_priimek FROM rezultat
+            JOIN voznik ON voznik.id = rezultat.voznik_id
+        GROUP BY voznik.id ORDER BY COUNT(*) DESC LIMIT 2
+    """).fetchall()
+    ekipa_id, ime = conn.execute("""
+        SELECT ekipa.id, ekipa.ime FROM rezultat
+            JOIN ekipa ON ekipa.id = rezultat.ekipa_id
+        GROUP BY ekipa.id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    proga_id, drzava = conn.execute("SELECT id, drzava FROM proga LIMIT 1").fetchone()
+    event_id, leto = conn.execute("SELECT id, leto FROM event ORDER BY id DESC LIMIT 1").fetchone()
+    objekti = {
+        modul.Voznik: modul.Voznik(ime_priimek, id=voznik_id),
+        modul.Ekipa: modul.Ekipa(ime, id=ekipa_id),
+        modul.Proga: modul.Proga(drzava, drzava, id=proga_id),
+        modul.Event: modul.Event(drzava, leto, id=event_id),
+    }
+    argumenti = {"niz": ime_priimek.split()[-1], "leto": leto, "id": event_id,
+                 "vozniki": [objekti[modul.Voznik]], "po": 0, "velikost": 50,
+                 "drugi": modul.Voznik(drugo_ime, id=drugi_id)}
+    return objekti, argumenti
+
+
+def izmeri_poizvedbe(conn, modul=model):
+    """
+    Izmeri metode poisci* razredov Voznik, Ekipa, Proga in Event iz modula,
+    ki jih razred sam definira (za stolpci le tiste, ki berejo iz shrambe).
+    Vrne slovar {"Razred.metoda": milisekunde}.
+    """
+    objekti, argumenti = vzorci(conn, modul)
+    meritve = {}
+    for razred, objekt in objekti.items():
+        for ime, metoda in inspect.getmembers(razred, callable):
+            if not ime.startswith("poisci") or ime not in vars(razred):
+                continue
+            parametri = [p for p in inspect.signature(metoda).parameters if p != "self"]
+            if isinstance(inspect.getattr_static(razred, ime), staticmethod):
+                klic = getattr(razred, ime)
+            else:
+                klic = getattr(objekt, ime)
+            vrednosti = [argumenti[p] for p in parametri]
+            meritve[f"{razred.__name__}.{ime}"] = izmeri(lambda: klic(*vrednosti))
+    return meritve
+
+
+def nova_dirka(drzava, leto=2099):
+    """
+    Vrne vrstice novega bloka dirke v obliki motogp_rezultati.csv.
+    """
+    vrstice = [f"@,dirka,{drzava},{leto}\n"]
+    for mesto, tocke in enumerate(TOCKE, 1):
+        vrstice.append(f"{mesto},{tocke},V0. Voznik{mesto},EKIPA 0-{mesto // 2},{2300 + mesto:.3f}\n")
+    return vrstice
+
+
+def izmeri_sprotni_uvoz(tabele, datoteka):
+    """
+    Izmeri sprotni uvoz po zaporednih spremembah datoteke: nova dirka na
+    koncu, nova dirka na začetku (zamakne vse ostale bloke), popravljena
+    uvrstitev v bloku na sredini, izbrisan blok na sredini in nato še ena
+    nova dirka na koncu. Na koncu preveri, da so sprotno posodobljene ocene
+    enake ocenam, izračunanim na novo.
+    Vrne slovar {primer: (čas v s, vrstice)}.
+    """
+    def spremeni(sprememba):
+        with open(datoteka, encoding="utf-8") as dat:
+            vrstice = dat.readlines()
+        with open(datoteka, "w", encoding="utf-8", newline="") as dat:
+            dat.writelines(sprememba(vrstice))
+        st_vrstic, cas = baza.uvozi_sprotno(tabele, datoteka)
+        return cas, st_vrstic
+
+    def popravi_sredino(vrstice):
+        glave = [i for i, vrstica in enumerate(vrstice) if vrstica.startswith("@,")]
+        i = glave[len(glave) // 2] + 1
+        mesto, tocke, ime, ekipa, cas = vrstice[i].rstrip("\n").split(",")
+        vrstice[i] = f"{mesto},{tocke},{ime},{ekipa},{float(cas) - 0.5:.3f}\n"
+        return vrstice
+
+    def izbrisi_sredino(vrstice):
+        glave = [i for i, vrstica in enumerate(vrstice) if vrstica.startswith("@,")]
+        i = len(glave) // 2
+        return vrstice[:glave[i]] + vrstice[glave[i + 1]:]
+
+    meritve = {
+        "konec": spremeni(lambda vrstice: vrstice + nova_dirka("nov")),
+        "zacetek": spremeni(lambda vrstice: nova_dirka("zac") + vrstice),
+        "sredina": spremeni(popravi_sredino),
+        "izbris": spremeni(izbrisi_sredino),
+        "konec_po_izbrisu": spremeni(lambda vrstice: vrstice + nova_dirka("kon")),
+    }
+    preveri_ocene(tabele[0].conn)
+    return meritve
+
+
+def preveri_ocene(conn):
+    """
+    Preveri, da je zgodovina ocen enaka zgodovini, izračunani na novo iz vseh rezultatov.
+    """
+    sql = "SELECT voznik_id, zaporedje, event_id, ROUND(ocena, 6) FROM ocena ORDER BY voznik_id, zaporedje"
+    sprotne = conn.execute(sql).fetchall()
+    with conn:
+        baza.Ocena(conn).napolni()
+    if conn.execute(sql).fetchall() != sprotne:
+        raise AssertionError("Sprotno posodobljene ocene se razlikujejo od ocen, izračunanih na novo.")
+
+
+def izmeri_velikost(faktor, mapa):
+    """
+    Izvede vse meritve za dani faktor velikosti podatkov.
+    """
+    sezone, kategorije = VELIKOSTI.get(faktor, (3 * faktor, 1))
+    datoteka = os.path.join(mapa, f"podatki_{faktor}.csv")
+    st_vrstic = generiraj(datoteka, sezone=sezone, kategorije=kategorije)
+
+    pot = os.path.join(mapa, f"baza_{faktor}.db")
+    conn = sqlite3.connect(pot)
+    _, cas_uvoza = baza.ustvari_bazo(conn, [datoteka])
+    tabele = baza.pripravi_tabele(conn)
+
+    sprotni = izmeri_sprotni_uvoz(tabele, datoteka)
+
+    povezave.nastavi(pot)
+    poizvedbe = izmeri_poizvedbe(conn)
+    zacetek = time.perf_counter()
+    stolpci.shramba()
+    cas_shrambe = time.perf_counter() - zacetek
+    poizvedbe_stolpcev = izmeri_poizvedbe(conn, stolpci)
+    conn.close()
+    return {
+        "vrstice": st_vrstic,
+        "uvoz_s": cas_uvoza,
+        "uvoz_vrstic_na_s": st_vrstic / cas_uvoza,
+        "sprotni_uvoz": {primer: {"s": cas, "vrstice": vrstice} for primer, (cas, vrstice) in sprotni.items()},
+        "poizvedbe_ms": poizvedbe,
+        "nalaganje_stolpcev_s": cas_shrambe,
+        "stolpci_ms": poizvedbe_stolpcev,
+    }
+
+
+def main(faktorji, izhod):
+    """
+    Izmeri vse faktorje in rezultate zapiše v datoteko JSON.
+    """
+    porocilo = {
+        "cas": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "meritve": {},
+    }
+    with tempfile.TemporaryDirectory() as mapa:
+        for faktor in faktorji:
+            meritev = izmeri_velikost(faktor, mapa)
+            porocilo["meritve"][f"{faktor}x"] = meritev
+            print(f"{faktor}x: {meritev['vrstice']} vrstic, uvoz {meritev['uvoz_s']:.3f} s")
+            for primer, sprotni in meritev["sprotni_uvoz"].items():
+                print(f"    sprotni uvoz ({primer}): {sprotni['vrstice']} vrstic, {sprotni['s'] * 1000:.1f} ms")
+            for ime, ms in meritev["poizvedbe_ms"].items():
+                print(f"    {ime}: {ms:.3f} ms")
+            print(f"    stolpci (nalaganje {meritev['nalaganje_stolpcev_s'] * 1000:.1f} ms):")
+            for ime, ms in meritev["stolpci_ms"].items():
+                print(f"    stolpci.{ime}: {ms:.3f} ms")
+    with open(izhod, "w", encoding="utf-8") as dat:
+        json.dump(porocilo, dat, indent=2)
+
+
+if __name__ == "__main__":
+    faktorji = [int(arg) for arg in sys.argv[1:] if arg.isdigit()] or [1, 10, 100]
+    izhod = next((arg for arg in sys.argv[1:] if arg.endswith(".json")), "benchmark.json")
+    main(faktorji, izhod)
@@ -0,0 +1,87 @@
+"""
+Branje datotek z rezultati dirk v obliki motogp_rezultati.csv.
+
+Datoteka je sestavljena iz blokov. Vsak blok se začne z glavo
+`@,dirka,<drzava>,<leto>`, sledijo pa ji vrstice
+`mesto,tocke,ime_priimek,ekipa,cas`. Datoteke se berejo sproti,
+zato poraba pomnilnika ni odvisna od njihove velikosti.
+"""
+import csv
+import gzip
+import io
+from collections import namedtuple
+
+Dirka = namedtuple("Dirka", ["drzava", "leto"])
+Uvrstitev = namedtuple("Uvrstitev", ["mesto", "tocke", "ime_priimek", "ekipa", "cas"])
+
+GZIP_GLAVA = b"\x1f\x8b"
+
+
+def odpri(datoteka, nacin="r"):
+    """
+    Odpre navadno ali z gzip stisnjeno datoteko.
+    V načinu "r" vrne besedilno, v načinu "rb" pa binarno datoteko.
+    """
+    with open(datoteka, "rb") as dat:
+        stisnjena = dat.read(2) == GZIP_GLAVA
+    surova = gzip.open(datoteka, "rb") if stisnjena else open(datoteka, "rb")
+    if nacin == "rb":
+        return surova
+    return io.TextIOWrapper(surova, encoding="utf-8", newline="")
+
+
+def razcleni_uvrstitev(podatki, st_vrstice=None):
+    """
+    Iz seznama polj ene vrstice sestavi uvrstitev s pravimi tipi.
+    """
+    if len(podatki) != 5:
+        raise ValueError(f"Vrstica {st_vrstice}: pričakovanih 5 polj, dobljenih {len(podatki)}.")
+    mesto, tocke, ime_priimek, ekipa, cas = podatki
+    try:
+        return Uvrstitev(int(mesto), int(tocke or 0), ime_priimek.strip(), ekipa.strip(), float(cas))
+    except ValueError:
+        raise ValueError(f"Vrstica {st_vrstice}: neveljavna števila v {podatki}.") from None
+
+
+def razcleni_glavo(podatki):
+    """
+    Iz seznama polj glave bloka sestavi dirko.
+    """
+    return Dirka(podatki[2], int(podatki[3]))
+
+
+def beri_dirke(vrstice):
+    """
+    Iz vrstic datoteke vrača pare (Dirka, seznam uvrstitev).
+    Uvrstitve pred prvo glavo se izpustijo.
+    """
+    dirka = None
+    uvrstitve = []
+    bralnik = csv.reader(vrstice)
+    for podatki in bralnik:
+        if not podatki:
+            continue
+        if podatki[0] == "@":
+            if dirka is not None:
+                yield dirka, uvrstitve
+            dirka, uvrstitve = razcleni_glavo(podatki), []
+        elif dirka is not None:
+            uvrstitve.append(razcleni_uvrstitev(podatki, bralnik.line_num))
+    if dirka is not None:
+        yield dirka, uvrstitve
+
+
+def preberi(datoteka):
+    """
+    Sproti prebere datoteko in vrača pare (Dirka, seznam uvrstitev).
+    """
+    with odpri(datoteka) as dat:
+        yield from beri_dirke(dat)
+
+
+def preberi_vse(datoteka):
+    """
+    Prebere celotno datoteko in vrne seznam parov (Dirka, seznam uvrstitev).
+    Namenjena je branju v ločenih procesih.
+    """
+    return list(preberi(datoteka))
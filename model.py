@@ -1,9 +1,24 @@
 import baza
-import sqlite3
 import re
+from povezava import povezave
+
+# poizvedbe tečejo na povezavi za branje trenutne niti
+conn = povezave
+
+# kronološki vrstni red dirk znotraj sezone (glej baza.KRONOLOSKO)
+KRONOLOSKO = baza.KRONOLOSKO
+
+def iskalni_izraz(niz):
+    """
+    Iz vnosa uporabnika sestavi poizvedbo FTS5, v kateri se mora
+    vsaka beseda ujemati z začetkom ene od besed v zadetku.
+    Vrne None, če vnos ne vsebuje nobene besede.
+    """
+    besede = re.findall(r"\w+", niz)
+    if not besede:
+        return None
+    return " ".join(f'"{beseda}"*' for beseda in besede)
 
-conn = sqlite3.connect('baza.db', timeout=10)
-baza.ustvari_bazo_ce_ne_obstaja(conn)
 
 def formatiraj_cas(sekunde):
     if sekunde is None:
@@ -51,15 +66,28 @@ class Voznik:
         Vrne število točk voznika po letih.
         """
         sql = """
-            SELECT SUM(rezultat.tocke),  event.leto FROM rezultat
-                JOIN event ON event.id = rezultat.event_id
-            WHERE rezultat.voznik_id = ?
-            GROUP BY event.leto
-            ORDER BY event.leto DESC;
+            SELECT tocke, leto FROM voznik_sezona
+            WHERE voznik_id = ?
+            ORDER BY leto DESC;
         """
         for st_tock, leto in conn.execute(sql, [self.id]):
             yield (st_tock, leto)
 
+    def poisci_ocene(self):
+        """
+        Vrne zgodovino ocen Elo voznika v kronološkem vrstnem redu
+        kot četverice (leto, proga, ocena, sprememba).
+        """
+        sql = """
+            SELECT event.leto, proga.ime_proge, ocena.ocena, ocena.sprememba FROM ocena
+                JOIN event ON event.id = ocena.event_id
+                JOIN proga ON proga.id = event.id_proge
+            WHERE ocena.voznik_id = ?
+            ORDER BY ocena.zaporedje;
+        """
+        for leto, proga, ocena, sprememba in conn.execute(sql, [self.id]):
+            yield (leto, proga, ocena, sprememba)
+
     def poisci_ekipe(self):
         """
         Vrne ekipo voznika po letih.
@@ -79,66 +107,245 @@ class Voznik:
         """
         Vrne skupno število točk voznika.
         """
-        sql = """
-            SELECT SUM(rezultat.tocke) FROM rezultat
-                JOIN event ON event.id = rezultat.event_id
-            WHERE rezultat.voznik_id = ?;
-        """
+        sql = "SELECT SUM(tocke) FROM voznik_sezona WHERE voznik_id = ?;"
         return conn.execute(sql, [self.id]).fetchone()[0]  
         
     def poisci_skupno_st_nastopov(self):
         """
         Vrne skupno število nastopov voznika.
         """
-        sql = """
-            SELECT COUNT(*) FROM rezultat
-                JOIN event ON event.id = rezultat.event_id
-            WHERE rezultat.voznik_id = ?;
-        """
+        sql = "SELECT COALESCE(SUM(nastopi), 0) FROM voznik_sezona WHERE voznik_id = ?;"
         return conn.execute(sql, [self.id]).fetchone()[0]
         
     def poisci_skupno_st_zmag(self):
         """
         Vrne skupno število zmag voznika.
         """
-        sql = """
-            SELECT COUNT(*) FROM rezultat
-                JOIN event ON event.id = rezultat.event_id
-            WHERE rezultat.voznik_id = ? AND rezultat.mesto = 1;
-        """
+        sql = "SELECT COALESCE(SUM(zmage), 0) FROM voznik_sezona WHERE voznik_id = ?;"
         return conn.execute(sql, [self.id]).fetchone()[0] 
     
     def poisci_skupno_st_stopnick(self):
         """
-        Vrne skupno število zmag voznika.
+        Vrne skupno število stopničk voznika.
         """
-        sql = """
-            SELECT COUNT(*) FROM rezultat
+        sql = "SELECT COALESCE(SUM(stopnicke), 0) FROM voznik_sezona WHERE voznik_id = ?;"
+        return conn.execute(sql, [self.id]).fetchone()[0]
+
+    def poisci_profil(self):
+        """
+        Vrne profil voznika (ProfilVoznika).
+        """
+        return Voznik.poisci_profile([self])[self.id]
+
+    @staticmethod
+    def poisci_profile(vozniki):
+        """
+        Vrne slovar {id voznika: ProfilVoznika} za vse podane voznike.
+        Vse številke se izračunajo v enem prehodu čez tabelo rezultat.
+        """
+        profili = {voznik.id: ProfilVoznika(voznik) for voznik in vozniki}
+        if not profili:
+            return profili
+        sql = f"""
+            SELECT rezultat.voznik_id, event.leto, ekipa.ime,
+                COUNT(*),
+                SUM(rezultat.mesto = 1),
+                SUM(rezultat.mesto IN (1,2,3)),
+                SUM(rezultat.tocke)
+            FROM rezultat
                 JOIN event ON event.id = rezultat.event_id
-            WHERE rezultat.voznik_id = ?  AND rezultat.mesto in (1,2,3);
+                JOIN ekipa ON ekipa.id = rezultat.ekipa_id
+            WHERE rezultat.voznik_id IN ({", ".join("?" * len(profili))})
+            GROUP BY rezultat.voznik_id, event.leto, ekipa.id
+            ORDER BY event.leto DESC;
         """
-        return conn.execute(sql, [self.id]).fetchone()[0]
+        for voznik_id, leto, ekipa, nastopi, zmage, stopnicke, tocke in conn.execute(sql, list(profili)):
+            profili[voznik_id].dodaj(leto, ekipa, nastopi, zmage or 0, stopnicke or 0, tocke)
+        return profili
+
+    @staticmethod
+    def poisci_zmage_voznikov(vozniki):
+        """
+        Vrne zmage vseh podanih voznikov.
+        """
+        vozniki = list(vozniki)
+        if not vozniki:
+            return
+        sql = f"""
+            SELECT proga.ime_proge, proga.drzava, event.leto FROM rezultat
+                JOIN event ON event.id = rezultat.event_id
+                JOIN proga ON proga.id = event.id_proge
+            WHERE rezultat.voznik_id IN ({", ".join("?" * len(vozniki))}) AND rezultat.mesto = 1
+            ORDER BY rezultat.voznik_id, event.leto DESC;
+        """
+        for proga, drzava, leto in conn.execute(sql, [voznik.id for voznik in vozniki]):
+            yield (proga, drzava, leto)
     
     
-    @staticmethod
-    def poisci(niz):
+    # primerjava dveh nastopov istega eventa: a je prvi voznik, b drugi;
+    # neuvrščeni (mesto 0) se ne primerjajo po mestu
+    PRIMERJAVA_SQL = """
+        COUNT(*),
+        COALESCE(SUM(NULLIF(a.mesto, 0) < NULLIF(b.mesto, 0)), 0),
+        COALESCE(SUM(NULLIF(b.mesto, 0) < NULLIF(a.mesto, 0)), 0),
+        AVG(NULLIF(a.mesto, 0) - NULLIF(b.mesto, 0)),
+        COALESCE(SUM(COALESCE(a.tocke, 0) - COALESCE(b.tocke, 0)), 0),
+        AVG(a.cas - b.cas)
+    """
+
+    def poisci_primerjavo(self, drugi):
         """
-        Vrne vse voznike, ki v imenu vsebujejo dani niz za priimek.
+        Vrne primerjavo (Primerjava) voznika z drugim voznikom na eventih,
+        na katerih sta nastopila oba.
+        """
+        sql = f"""
+            SELECT {Voznik.PRIMERJAVA_SQL}
+            FROM rezultat AS a
+                JOIN rezultat AS b ON b.event_id = a.event_id
+            WHERE a.voznik_id = ? AND b.voznik_id = ?
+        """
+        return Primerjava(self, drugi, *conn.execute(sql, [self.id, drugi.id]).fetchone())
+
+    @classmethod
+    def poisci_primerjave_sotekmovalcev(cls, leto):
+        """
+        Vrne primerjave vseh parov voznikov, ki so v dani sezoni vozili za
+        isto ekipo, kot seznam parov (ekipa, Primerjava). Šteje se le eventi,
+        na katerih sta oba vozila za to ekipo.
+        """
+        sql = f"""
+            SELECT ekipa.ime, va.id, va.ime_priimek, vb.id, vb.ime_priimek, {Voznik.PRIMERJAVA_SQL}
+            FROM rezultat AS a
+                JOIN rezultat AS b ON b.event_id = a.event_id AND b.ekipa_id = a.ekipa_id
+                                  AND b.voznik_id > a.voznik_id
+                JOIN event ON event.id = a.event_id
+                JOIN ekipa ON ekipa.id = a.ekipa_id
+                JOIN voznik AS va ON va.id = a.voznik_id
+                JOIN voznik AS vb ON vb.id = b.voznik_id
+            WHERE event.leto = ?
+            GROUP BY a.ekipa_id, a.voznik_id, b.voznik_id
+            ORDER BY ekipa.ime, COUNT(*) DESC
+        """
+        for ekipa, id, ime, drugi_id, drugo_ime, *stevilke in conn.execute(sql, [leto]):
+            yield (ekipa, Primerjava(cls(ime, id=id), cls(drugo_ime, id=drugi_id), *stevilke))
+
+    @classmethod
+    def poisci_po_id(cls, id):
+        """
+        Vrne voznika z danim id-jem ali None, če ga ni.
+        """
+        vrstica = conn.execute("SELECT id, ime_priimek FROM voznik WHERE id = ?", [id]).fetchone()
+        return cls(ime_priimek=vrstica[1], id=vrstica[0]) if vrstica else None
+
+    @classmethod
+    def poisci_stran(cls, po=0, velikost=50):
+        """
+        Vrne največ velikost voznikov z id-jem, večjim od po, urejenih po id-ju.
+        """
+        sql = "SELECT id, ime_priimek FROM voznik WHERE id > ? ORDER BY id LIMIT ?"
+        for id, ime_priimek in conn.execute(sql, [po, velikost]):
+            yield cls(ime_priimek=ime_priimek, id=id)
+
+    @classmethod
+    def poisci(cls, niz):
+        """
+        Vrne voznike, katerih ime se ujema z danim nizom, urejene po ustreznosti.
+        Prazen niz vrne vse voznike.
         """
         if niz is None:
             return "Vnesi priimek!"
-        sql = "SELECT id, ime_priimek FROM voznik WHERE ime_priimek LIKE ?"
-        for id, ime_priimek in conn.execute(sql, [f'%{niz}%']):
-            yield Voznik(ime_priimek=ime_priimek, id=id)
+        izraz = iskalni_izraz(niz)
+        if not niz.strip():
+            sql = "SELECT id, ime_priimek FROM voznik"
+            parametri = {}
+        elif izraz is None:
+            return
+        else:
+            sql = """
+                SELECT voznik.id, voznik.ime_priimek FROM voznik_iskanje
+                    JOIN voznik ON voznik.id = voznik_iskanje.rowid
+                WHERE voznik_iskanje MATCH :izraz
+                ORDER BY voznik.ime_priimek = :niz DESC, voznik_iskanje.rank
+            """
+            parametri = {"izraz": izraz, "niz": niz}
+        for id, ime_priimek in conn.execute(sql, parametri):
+            yield cls(ime_priimek=ime_priimek, id=id)
 
     def dodaj_v_bazo(self):
         """
         Doda voznika v bazo.
         """
         assert self.id is None
-        with conn:
+        with povezave.pisi() as pisalna:
             podatki_voznika = {"ime_priimek" : self.ime_priimek}
-            self.id = Voznik.dodaj_vrstico(**podatki_voznika)
+            self.id = baza.Voznik(pisalna).dodaj_vrstico(**podatki_voznika)
+
+
+class ProfilVoznika:
+    """
+    Razred za profil voznika: skupne številke ter točke, zmage in ekipe po sezonah.
+    """
+
+    def __init__(self, voznik):
+        """
+        Konstruktor praznega profila.
+        """
+        self.voznik = voznik
+        self.nastopi = 0
+        self.zmage = 0
+        self.stopnicke = 0
+        self.tocke = None
+        self.sezone = {}
+        self.ekipe = []
+
+    def dodaj(self, leto, ekipa, nastopi, zmage, stopnicke, tocke):
+        """
+        Profilu prišteje rezultate voznika za eno ekipo v eni sezoni.
+        """
+        self.nastopi += nastopi
+        self.zmage += zmage
+        self.stopnicke += stopnicke
+        if tocke is not None:
+            self.tocke = (self.tocke or 0) + tocke
+        tocke_sezone, zmage_sezone = self.sezone.get(leto, (None, 0))
+        if tocke is not None:
+            tocke_sezone = (tocke_sezone or 0) + tocke
+        self.sezone[leto] = (tocke_sezone, zmage_sezone + zmage)
+        self.ekipe.append((ekipa, leto))
+
+    def poisci_tocke(self):
+        """
+        Vrne število točk po letih, enako kot Voznik.poisci_tocke.
+        """
+        for leto, (tocke, _) in self.sezone.items():
+            yield (tocke, leto)
+
+
+class Primerjava:
+    """
+    Razred za primerjavo dveh voznikov na skupnih eventih.
+
+    Polja:
+    - voznik, drugi: primerjana voznika
+    - nastopi: število eventov, na katerih sta nastopila oba
+    - pred, za: kolikokrat je bil voznik pred drugim oz. za njim
+    - razlika_mest: povprečna razlika mest (negativna, če je voznik v povprečju boljši)
+    - razlika_tock: razlika v skupnem številu točk na skupnih eventih
+    - razlika_casa: povprečna razlika časov v sekundah ali None, če časov ni
+    """
+
+    def __init__(self, voznik, drugi, nastopi, pred, za, razlika_mest, razlika_tock, razlika_casa):
+        """
+        Konstruktor primerjave.
+        """
+        self.voznik = voznik
+        self.drugi = drugi
+        self.nastopi = nastopi
+        self.pred = pred
+        self.za = za
+        self.razlika_mest = razlika_mest
+        self.razlika_tock = razlika_tock
+        self.razlika_casa = razlika_casa
 
 
 class Ekipa:
@@ -160,16 +367,39 @@ class Ekipa:
         """
         return self.ime
 
-    @staticmethod
-    def poisci(niz):
+    @classmethod
+    def poisci_stran(cls, po=0, velikost=50):
         """
-        Vrne vse ekipe, ki v imenu vsebujejo dani niz.
+        Vrne največ velikost ekip z id-jem, večjim od po, urejenih po id-ju.
+        """
+        sql = "SELECT id, ime FROM ekipa WHERE id > ? ORDER BY id LIMIT ?"
+        for id, ime in conn.execute(sql, [po, velikost]):
+            yield cls(id=id, ime=ime)
+
+    @classmethod
+    def poisci(cls, niz):
+        """
+        Vrne ekipe, katerih ime se ujema z danim nizom, urejene po ustreznosti.
+        Prazen niz vrne vse ekipe.
         """
         if niz is None:
             return "Vnesi ekipo!"
-        sql = "SELECT id, ime FROM ekipa WHERE ime LIKE ?"
-        for id, ime in conn.execute(sql, [f'%{niz}%']):
-            yield Ekipa(id=id, ime=ime)
+        izraz = iskalni_izraz(niz)
+        if not niz.strip():
+            sql = "SELECT id, ime FROM ekipa"
+            parametri = {}
+        elif izraz is None:
+            return
+        else:
+            sql = """
+                SELECT ekipa.id, ekipa.ime FROM ekipa_iskanje
+                    JOIN ekipa ON ekipa.id = ekipa_iskanje.rowid
+                WHERE ekipa_iskanje MATCH :izraz
+                ORDER BY ekipa.ime = :niz DESC, ekipa_iskanje.rank
+            """
+            parametri = {"izraz": izraz, "niz": niz}
+        for id, ime in conn.execute(sql, parametri):
+            yield cls(id=id, ime=ime)
 
     def poisci_voznike(self):
         """
@@ -196,23 +426,20 @@ class Ekipa:
     def poisci_skupne_tocke_in_najboljsi_voznik(self):
         """
         Vrne skupno število točk ekipe in voznika, ki je prispeval največ točk.
+        Ob enakem številu točk šteje več nastopov za ekipo, nato manjši id voznika.
         """
         # Skupne točke ekipe
-        sql_skupno = """
-            SELECT SUM(rezultat.tocke)
-            FROM rezultat
-            WHERE rezultat.ekipa_id = ?
-        """
+        sql_skupno = "SELECT SUM(tocke) FROM ekipa_sezona WHERE ekipa_id = ?"
         skupno = conn.execute(sql_skupno, [self.id]).fetchone()[0] or 0
 
         # Voznik z največ točkami v tej ekipi
         sql_voznik = """
-            SELECT voznik.ime_priimek, SUM(rezultat.tocke) AS vsota
+            SELECT voznik.ime_priimek, COALESCE(SUM(rezultat.tocke), 0) AS vsota
             FROM rezultat
                 JOIN voznik ON voznik.id = rezultat.voznik_id
             WHERE rezultat.ekipa_id = ?
             GROUP BY voznik.id
-            ORDER BY vsota DESC
+            ORDER BY vsota DESC, COUNT(*) DESC, voznik.id
             LIMIT 1
         """
         row = conn.execute(sql_voznik, [self.id]).fetchone()
@@ -220,6 +447,59 @@ class Ekipa:
 
         return skupno, najboljsi_voznik
 
+    # izračunane lestvice {leto: vrstice}, veljavne za generacijo baze _generacija_lestvic
+    _lestvice = {}
+    _generacija_lestvic = None
+
+    @staticmethod
+    def poisci_lestvico(leto=None):
+        """
+        Vrne lestvico ekip kot seznam četveric (mesto, ekipa, točke, najboljši voznik).
+        Če je podano leto, se štejejo le rezultati te sezone.
+        Lestvica se izračuna z eno poizvedbo in hrani, dokler se baza ne spremeni.
+        """
+        generacija = povezave.generacija()
+        if Ekipa._generacija_lestvic != generacija:
+            Ekipa._lestvice = {}
+            Ekipa._generacija_lestvic = generacija
+        if leto not in Ekipa._lestvice:
+            Ekipa._lestvice[leto] = Ekipa._izracunaj_lestvico(leto)
+        return Ekipa._lestvice[leto]
+
+    @staticmethod
+    def _izracunaj_lestvico(leto):
+        """
+        Vrne lestvico ekip, izračunano z eno poizvedbo z okenskimi funkcijami.
+        """
+        sql = """
+            WITH tocke_voznikov AS (
+                SELECT rezultat.ekipa_id, rezultat.voznik_id, SUM(rezultat.tocke) AS tocke
+                FROM rezultat
+                    JOIN event ON event.id = rezultat.event_id
+                WHERE :leto IS NULL OR event.leto = :leto
+                GROUP BY rezultat.ekipa_id, rezultat.voznik_id
+            ),
+            ekipe AS (
+                SELECT
+                    ekipa_id,
+                    voznik_id,
+                    SUM(tocke) OVER (PARTITION BY ekipa_id) AS skupno,
+                    ROW_NUMBER() OVER (PARTITION BY ekipa_id ORDER BY tocke DESC, voznik_id) AS vrstni_red
+                FROM tocke_voznikov
+            )
+            SELECT
+                RANK() OVER (ORDER BY COALESCE(ekipe.skupno, 0) DESC) AS mesto,
+                ekipa.ime,
+                COALESCE(ekipe.skupno, 0) AS skupno,
+                voznik.ime_priimek
+            FROM ekipa
+                LEFT JOIN ekipe ON ekipe.ekipa_id = ekipa.id AND ekipe.vrstni_red = 1
+                LEFT JOIN voznik ON voznik.id = ekipe.voznik_id
+            WHERE :leto IS NULL OR ekipe.ekipa_id IS NOT NULL
+            ORDER BY skupno DESC, ekipa.id
+        """
+        return conn.execute(sql, {"leto": leto}).fetchall()
+
 class Proga:
     """
     Razred za progo.
@@ -272,16 +552,39 @@ class Proga:
         for leto, mesto, ime_priimek in conn.execute(sql, [self.id]):
             yield (leto, mesto, ime_priimek)
 
-    @staticmethod
-    def poisci(niz):
+    @classmethod
+    def poisci_stran(cls, po=0, velikost=50):
+        """
+        Vrne največ velikost prog z id-jem, večjim od po, urejenih po id-ju.
+        """
+        sql = "SELECT id, ime_proge, drzava FROM proga WHERE id > ? ORDER BY id LIMIT ?"
+        for id, ime_proge, drzava in conn.execute(sql, [po, velikost]):
+            yield cls(ime=ime_proge, drzava=drzava, id=id)
+
+    @classmethod
+    def poisci(cls, niz):
         """
-        Vrne vse proge, ki v imenu vsebujejo dani niz.
+        Vrne proge, katerih ime ali država se ujema z danim nizom, urejene po ustreznosti.
+        Prazen niz vrne vse proge.
         """
         if niz is None:
             return "Vnesi nekaj!"
-        sql = "SELECT id, ime_proge, drzava FROM proga WHERE ime_proge LIKE ? OR drzava LIKE ?"
-        for id, ime_proge, drzava in conn.execute(sql, [f'%{niz}%', f'%{niz}%']):
-            yield Proga(ime=ime_proge, drzava=drzava, id=id)
+        izraz = iskalni_izraz(niz)
+        if not niz.strip():
+            sql = "SELECT id, ime_proge, drzava FROM proga"
+            parametri = {}
+        elif izraz is None:
+            return
+        else:
+            sql = """
+                SELECT proga.id, proga.ime_proge, proga.drzava FROM proga_iskanje
+                    JOIN proga ON proga.id = proga_iskanje.rowid
+                WHERE proga_iskanje MATCH :izraz
+                ORDER BY proga.ime_proge = :niz OR proga.drzava = :niz DESC, proga_iskanje.rank
+            """
+            parametri = {"izraz": izraz, "niz": niz}
+        for id, ime_proge, drzava in conn.execute(sql, parametri):
+            yield cls(ime=ime_proge, drzava=drzava, id=id)
 
 
 class Event:
@@ -303,7 +606,72 @@ class Event:
         Vrne ime in lokacijo.
         """
         return self.ime + ", " + str(self.leto)
-    
+
+    # že naloženi eventi {id: Event}, veljavni za generacijo baze _generacija_eventov;
+    # podrazred, ki ju ponovno določi, ima svoje
+    _eventi = {}
+    _generacija_eventov = None
+
+    @classmethod
+    def _iz_vrstice(cls, generacija, id, ime, leto):
+        """
+        Vrne edini objekt eventa z danim id-jem in ga po potrebi ustvari.
+        Generacijo baze prebere klicatelj enkrat za celo poizvedbo.
+        """
+        if cls._generacija_eventov != generacija:
+            cls._eventi = {}
+            cls._generacija_eventov = generacija
+        event = cls._eventi.get(id)
+        if event is None:
+            event = cls._eventi[id] = cls(id=id, ime=ime, leto=leto)
+        return event
+
+    @classmethod
+    def poisci_po_id(cls, id):
+        """
+        Vrne event z danim id-jem ali None, če ga ni.
+        """
+        generacija = povezave.generacija()
+        if cls._generacija_eventov == generacija and id in cls._eventi:
+            return cls._eventi[id]
+        sql = """
+            SELECT event.id, proga.ime_proge, event.leto FROM event
+                JOIN proga ON proga.id = event.id_proge
+            WHERE event.id = ?
+        """
+        vrstica = conn.execute(sql, [id]).fetchone()
+        return cls._iz_vrstice(generacija, *vrstica) if vrstica else None
+
+    @classmethod
+    def poisci_vse(cls):
+        """
+        Vrne vse evente.
+        """
+        sql = """
+            SELECT event.id, proga.ime_proge, event.leto FROM event
+                JOIN proga ON proga.id = event.id_proge
+            ORDER BY event.id
+        """
+        generacija = povezave.generacija()
+        for id, ime_proge, leto in conn.execute(sql):
+            yield cls._iz_vrstice(generacija, id, ime_proge, leto)
+
+    @classmethod
+    def poisci_stran(cls, po=0, velikost=50):
+        """
+        Vrne največ velikost eventov z id-jem, večjim od po, urejenih po id-ju.
+        """
+        sql = """
+            SELECT event.id, proga.ime_proge, event.leto FROM event
+                JOIN proga ON proga.id = event.id_proge
+            WHERE event.id > ?
+            ORDER BY event.id
+            LIMIT ?
+        """
+        generacija = povezave.generacija()
+        for id, ime_proge, leto in conn.execute(sql, [po, velikost]):
+            yield cls._iz_vrstice(generacija, id, ime_proge, leto)
+
     @staticmethod
     def poisci_leto():
         """
@@ -313,18 +681,20 @@ class Event:
         for leto in conn.execute(sql):
             yield leto
 
-    @staticmethod
-    def poisci_evente_v_letu(leto):
+    @classmethod
+    def poisci_evente_v_letu(cls, leto):
         """
         Vrne vse evente in datume v danem letu.
         """
         sql = """
-            SELECT DISTINCT(event.id), proga.ime_proge, leto FROM event 
+            SELECT event.id, proga.ime_proge, event.leto FROM event
                 JOIN proga ON proga.id = event.id_proge
-                WHERE event.leto LIKE ? 
-            """
+            WHERE event.leto = ?
+            ORDER BY event.id
+        """
+        generacija = povezave.generacija()
         for id, ime_proge, leto in conn.execute(sql, [leto]):
-            yield Event(id=id, ime=ime_proge, leto=leto)
+            yield cls._iz_vrstice(generacija, id, ime_proge, leto)
             
     def poisci_rezultate_eventa(self):
         """
@@ -0,0 +1,144 @@
+"""
+Binarni posnetek podatkov, ki se ga da preslikati v pomnilnik (mmap).
+
+Datoteka je sestavljena iz glave, kazala v obliki JSON in podatkov:
+
+    glava:   značka (8 B), različica (4 B), rezerva (4 B),
+             generacija baze (8 B), dolžina kazala (8 B)
+    kazalo:  {"tabele": {ime: [tip, dolžina, odmik]}, "seznami": [ime, ...]}
+    podatki: stolpci s stalno širino elementov, vsak poravnan na 64 B
+
+Podatki se začnejo na prvem poravnanem mestu za kazalom, odmiki v
+kazalu pa so merjeni od tam.
+
+Seznami nizov (npr. imena voznikov) se shranijo kot tabele indeksov v
+skupno tabelo nizov, v kateri se vsak niz pojavi le enkrat. Nalagalnik
+tabele vrne kot poglede v preslikano datoteko brez kopiranja, zato si
+procesi, ki berejo isti posnetek, delijo pomnilnik v predpomnilniku strani.
+"""
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+ZNACKA = b"MOTOGP\x00\x01"
+RAZLICICA = 2  # 2: shramba hrani tudi krog_eventa
+GLAVA = struct.Struct("<8sIIqQ")
+PORAVNAVA = 64
+NIZI = "_nizi"
+ZACETKI_NIZOV = "_zacetki_nizov"
+BREZ = -1
+
+
+def pot_za(pot_baze):
+    """
+    Vrne privzeto pot posnetka za dano bazo (baza.db -> baza.posnetek).
+    """
+    return os.path.splitext(pot_baze)[0] + ".posnetek"
+
+
+def zapisi(pot, tabele, seznami, generacija=None):
+    """
+    Zapiše posnetek s tabelami NumPy {ime: tabela} in seznami nizov
+    {ime: [niz ali None, ...]}. Obstoječa datoteka se zamenja naenkrat,
+    zato procesi, ki jo že berejo, vidijo staro različico do konca.
+    """
+    # vsak niz se v tabeli nizov pojavi le enkrat
+    indeksi_nizov = {}
+    tabele = dict(tabele)
+    for ime, seznam in seznami.items():
+        tabele[ime] = np.array(
+            [BREZ if niz is None else indeksi_nizov.setdefault(niz, len(indeksi_nizov)) for niz in seznam],
+            dtype=np.int32,
+        )
+    kodirani = [niz.encode("utf-8") for niz in indeksi_nizov]
+    tabele[NIZI] = np.frombuffer(b"".join(kodirani), dtype=np.uint8)
+    tabele[ZACETKI_NIZOV] = np.cumsum([0] + [len(niz) for niz in kodirani], dtype=np.int64)
+
+    tabele = {ime: np.ascontiguousarray(tabela) for ime, tabela in tabele.items()}
+    kazalo = {"tabele": {}, "seznami": list(seznami)}
+    odmik = 0
+    for ime, tabela in tabele.items():
+        kazalo["tabele"][ime] = [tabela.dtype.str, len(tabela), odmik]
+        odmik = poravnaj(odmik + tabela.nbytes)
+    kodirano_kazalo = json.dumps(kazalo).encode("utf-8")
+    zacetek_podatkov = poravnaj(GLAVA.size + len(kodirano_kazalo))
+
+    mapa = os.path.dirname(os.path.abspath(pot))
+    with tempfile.NamedTemporaryFile("wb", dir=mapa, prefix=".posnetek-", delete=False) as dat:
+        try:
+            dat.write(GLAVA.pack(ZNACKA, RAZLICICA, 0, BREZ if generacija is None else generacija,
+                                 len(kodirano_kazalo)))
+            dat.write(kodirano_kazalo)
+            for ime, tabela in tabele.items():
+                dat.seek(zacetek_podatkov + kazalo["tabele"][ime][2])
+                dat.write(tabela.tobytes())
+            dat.truncate(zacetek_podatkov + odmik)
+            dat.flush()
+            os.fsync(dat.fileno())
+            # začasne datoteke so dostopne le lastniku, posnetek pa naj berejo vsi procesi
+            os.chmod(dat.name, 0o644)
+        except BaseException:
+            os.unlink(dat.name)
+            raise
+    os.replace(dat.name, pot)
+
+
+def poravnaj(odmik):
+    """
+    Vrne najmanjši odmik, ki ni manjši od danega in je poravnan na PORAVNAVA.
+    """
+    return -(-odmik // PORAVNAVA) * PORAVNAVA
+
+
+def preberi_glavo(dat):
+    """
+    Prebere in preveri glavo posnetka. Vrne par (generacija, dolžina kazala).
+    """
+    glava = dat.read(GLAVA.size)
+    if len(glava) != GLAVA.size:
+        raise ValueError("Datoteka ni posnetek.")
+    znacka, razlicica, _, generacija, dolzina_kazala = GLAVA.unpack(glava)
+    if znacka != ZNACKA:
+        raise ValueError("Datoteka ni posnetek.")
+    if razlicica != RAZLICICA:
+        raise ValueError(f"Posnetek različice {razlicica} ni podprt (pričakovana {RAZLICICA}).")
+    return (None if generacija == BREZ else generacija), dolzina_kazala
+
+
+def generacija(pot):
+    """
+    Vrne generacijo baze, iz katere je posnetek, ali None, če posnetka ni
+    ali ga ni mogoče prebrati.
+    """
+    try:
+        with open(pot, "rb") as dat:
+            return preberi_glavo(dat)[0]
+    except (OSError, ValueError):
+        return None
+
+
+def preberi(pot):
+    """
+    Preslika posnetek v pomnilnik. Vrne trojico (tabele, seznami, generacija),
+    kjer so tabele le za branje in brez kopiranja kažejo v preslikano datoteko.
+    """
+    with open(pot, "rb") as dat:
+        generacija, dolzina_kazala = preberi_glavo(dat)
+        kazalo = json.loads(dat.read(dolzina_kazala))
+        pomnilnik = mmap.mmap(dat.fileno(), 0, access=mmap.ACCESS_READ)
+    zacetek_podatkov = poravnaj(GLAVA.size + dolzina_kazala)
+    tabele = {
+        ime: np.frombuffer(pomnilnik, dtype=np.dtype(tip), count=dolzina, offset=zacetek_podatkov + odmik)
+        for ime, (tip, dolzina, odmik) in kazalo["tabele"].items()
+    }
+    nizi, zacetki = tabele.pop(NIZI).tobytes(), tabele.pop(ZACETKI_NIZOV).tolist()
+    nizi = [nizi[zacetek:konec].decode("utf-8") for zacetek, konec in zip(zacetki, zacetki[1:])]
+    seznami = {
+        ime: [None if i == BREZ else nizi[i] for i in tabele.pop(ime).tolist()]
+        for ime in kazalo["seznami"]
+    }
+    return tabele, seznami, generacija
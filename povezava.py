@@ -0,0 +1,160 @@
+"""
+Skupno upravljanje povezav z bazo za model.py in spletni_vmesnik.py.
+
+Vsaka nit dobi svojo povezavo za branje, vsa pisanja pa gredo prek ene
+same povezave za pisanje. Baza teče v načinu WAL, zato bralci ne čakajo
+na pisanje in pisanje ne čaka na bralce.
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import baza
+
+POT = "baza.db"
+CACHE_SIZE = -16000  # v KiB, torej približno 16 MB na povezavo
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+class Povezave:
+    """
+    Razred, ki hrani povezave z eno bazo.
+    """
+
+    def __init__(self, pot=POT):
+        """
+        Konstruktor upravitelja povezav.
+        """
+        self.pot = pot
+        self.epoha = 0
+        self._lokalno = threading.local()
+        self._pisalna = None
+        self._kljucavnica = threading.Lock()
+        self._nadzorna = None
+        self._kljucavnica_stanja = threading.Lock()
+        self._verzija = None
+        self._stanje = None
+        self._pripravljena = False
+
+    def nastavi(self, pot):
+        """
+        Preklopi na drugo bazo. Obstoječe povezave se ob naslednji uporabi zamenjajo.
+        """
+        with self._kljucavnica:
+            if self._pisalna is not None:
+                self._pisalna.close()
+                self._pisalna = None
+            if pot != self.pot:
+                self._pripravljena = False
+            self.pot = pot
+            self.epoha += 1
+        with self._kljucavnica_stanja:
+            if self._nadzorna is not None:
+                self._nadzorna.close()
+                self._nadzorna = None
+            self._verzija = None
+
+    def zapri(self):
+        """
+        Zapre vse povezave tega procesa. Nove se odprejo ob naslednji uporabi.
+        Pred razcepom procesa (fork) je to obvezno, saj si procesa povezave ne smeta deliti.
+        """
+        self.nastavi(self.pot)
+        lokalno = self._lokalno
+        if getattr(lokalno, "conn", None) is not None:
+            lokalno.conn.close()
+            lokalno.conn = None
+
+    def pripravi(self):
+        """
+        Nastavljeno bazo ustvari ali dopolni, če se to v tem procesu še ni zgodilo.
+        """
+        if self._pripravljena:
+            return
+        with self._kljucavnica:
+            if not self._pripravljena:
+                if self._pisalna is None:
+                    self._pisalna = self.odpri()
+                baza.ustvari_bazo_ce_ne_obstaja(self._pisalna)
+                self._pripravljena = True
+
+    def odpri(self, samo_branje=False):
+        """
+        Odpre novo nastavljeno povezavo z bazo.
+        """
+        conn = sqlite3.connect(self.pot, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA cache_size = {CACHE_SIZE}")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+        if samo_branje:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def beri(self):
+        """
+        Vrne povezavo za branje, ki pripada trenutni niti.
+        """
+        lokalno = self._lokalno
+        if getattr(lokalno, "epoha", None) != self.epoha:
+            self.pripravi()
+            if getattr(lokalno, "conn", None) is not None:
+                lokalno.conn.close()
+            lokalno.conn = self.odpri(samo_branje=True)
+            lokalno.epoha = self.epoha
+        return lokalno.conn
+
+    def execute(self, sql, parametri=()):
+        """
+        Izvede poizvedbo na povezavi za branje trenutne niti.
+        """
+        return self.beri().execute(sql, parametri)
+
+    @contextmanager
+    def pisi(self):
+        """
+        Vrne povezavo za pisanje. Ob uspešnem koncu bloka with se spremembe
+        potrdijo, ob napaki pa razveljavijo. Hkrati lahko piše le ena nit.
+        Če se je v bloku kaj spremenilo, se poveča generacija baze.
+        """
+        self.pripravi()
+        with self._kljucavnica:
+            if self._pisalna is None:
+                self._pisalna = self.odpri()
+            conn = self._pisalna
+            try:
+                pred = conn.total_changes
+                yield conn
+                if conn.total_changes != pred:
+                    baza.povecaj_generacijo(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def stanje(self):
+        """
+        Vrne par (generacija, čas zadnje spremembe) baze.
+        Dokler se baza ne spremeni, to stane le en PRAGMA data_version.
+        """
+        with self._kljucavnica_stanja:
+            if self._nadzorna is None:
+                self.pripravi()
+                self._nadzorna = self.odpri(samo_branje=True)
+            # data_version se spremeni, ko bazo spremeni katerakoli druga povezava
+            verzija, = self._nadzorna.execute("PRAGMA data_version").fetchone()
+            if verzija != self._verzija:
+                self._stanje = self._nadzorna.execute(
+                    "SELECT generacija, spremenjeno FROM stanje WHERE id = 1").fetchone()
+                self._verzija = verzija
+            return self._stanje
+
+    def generacija(self):
+        """
+        Vrne števec sprememb baze.
+        """
+        return self.stanje()[0]
+
+
+povezave = Povezave()
@@ -0,0 +1,127 @@
+"""
+Predpomnilnik izrisanih strani z omejeno velikostjo in časom veljavnosti.
+
+Vsak vnos je označen z entitetami, ki jih prikazuje (npr. "voznik:12"),
+tako da pisanje razveljavi le prizadete strani. Če bazo spremeni kdo
+drug (npr. sprotni uvoz v drugem procesu), se predpomnilnik izprazni.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+NAJVEC_VNOSOV = 500
+CAS_VELJAVNOSTI = 300  # v sekundah
+
+
+class Predpomnilnik:
+    """
+    Predpomnilnik LRU z oznakami.
+    """
+
+    def __init__(self, generacija, najvec=NAJVEC_VNOSOV, cas_veljavnosti=CAS_VELJAVNOSTI):
+        """
+        Konstruktor predpomnilnika.
+
+        Argumenti:
+        - generacija: funkcija, ki vrne trenutno generacijo baze
+        - najvec: največje število vnosov
+        - cas_veljavnosti: čas v sekundah, po katerem vnos zastari
+        """
+        self._generacija = generacija
+        self.najvec = najvec
+        self.cas_veljavnosti = cas_veljavnosti
+        self.generacija = None
+        self.zadetki = 0
+        self.zgresitve = 0
+        self._vnosi = OrderedDict()  # {ključ: (vrednost, čas shranjevanja, oznake)}
+        self._po_oznakah = {}  # {oznaka: množica ključev}
+        self._kljucavnica = threading.Lock()
+
+    def _preveri_generacijo(self):
+        """
+        Izprazni predpomnilnik, če se je baza spremenila mimo njega.
+        """
+        generacija = self._generacija()
+        if generacija != self.generacija:
+            self._vnosi.clear()
+            self._po_oznakah.clear()
+            self.generacija = generacija
+
+    def _odstrani(self, kljuc):
+        """
+        Odstrani vnos in njegove oznake.
+        """
+        _, _, oznake = self._vnosi.pop(kljuc)
+        for oznaka in oznake:
+            kljuci = self._po_oznakah[oznaka]
+            kljuci.discard(kljuc)
+            if not kljuci:
+                del self._po_oznakah[oznaka]
+
+    def dobi(self, kljuc):
+        """
+        Vrne shranjeno vrednost ali None, če je ni.
+        """
+        with self._kljucavnica:
+            self._preveri_generacijo()
+            vnos = self._vnosi.get(kljuc)
+            if vnos is None or time.monotonic() - vnos[1] > self.cas_veljavnosti:
+                if vnos is not None:
+                    self._odstrani(kljuc)
+                self.zgresitve += 1
+                return None
+            self._vnosi.move_to_end(kljuc)
+            self.zadetki += 1
+            return vnos[0]
+
+    def shrani(self, kljuc, vrednost, oznake=(), generacija=None):
+        """
+        Shrani vrednost pod danim ključem in z danimi oznakami.
+        Če je podana generacija baze, iz katere je vrednost izračunana,
+        in ta ni več trenutna, se vrednost ne shrani.
+        """
+        with self._kljucavnica:
+            self._preveri_generacijo()
+            if generacija is not None and generacija != self.generacija:
+                return
+            if kljuc in self._vnosi:
+                self._odstrani(kljuc)
+            oznake = frozenset(oznake)
+            self._vnosi[kljuc] = (vrednost, time.monotonic(), oznake)
+            for oznaka in oznake:
+                self._po_oznakah.setdefault(oznaka, set()).add(kljuc)
+            while len(self._vnosi) > self.najvec:
+                self._odstrani(next(iter(self._vnosi)))
+
+    def razveljavi(self, *oznake):
+        """
+        Po pisanju v bazo odstrani vnose z danimi oznakami.
+        Če se je baza medtem spremenila še kako drugače, se izprazni ves predpomnilnik.
+        """
+        with self._kljucavnica:
+            for oznaka in oznake:
+                for kljuc in list(self._po_oznakah.get(oznaka, ())):
+                    self._odstrani(kljuc)
+            # eno pisanje poveča generacijo za ena; vse drugo pomeni tuje spremembe
+            if self.generacija is not None and self._generacija() == self.generacija + 1:
+                self.generacija += 1
+
+    def izprazni(self):
+        """
+        Odstrani vse vnose.
+        """
+        with self._kljucavnica:
+            self._vnosi.clear()
+            self._po_oznakah.clear()
+
+    def statistika(self):
+        """
+        Vrne slovar s številom vnosov, zadetkov in zgrešitev.
+        """
+        with self._kljucavnica:
+            return {
+                "vnosi": len(self._vnosi),
+                "najvec": self.najvec,
+                "zadetki": self.zadetki,
+                "zgresitve": self.zgresitve,
+            }
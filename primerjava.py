@@ -0,0 +1,134 @@
+"""
+Primerjava vseh parov voznikov ene sezone.
+
+Rezultati sezone se iz stolpčne shrambe (stolpci.py) razporedijo v tabele
+oblike (eventi, vozniki). Število skupnih nastopov ter vsote razlik mest,
+točk in časov za vse pare se nato izračunajo z množenjem matrik, število
+uvrstitev pred drugim pa z eno primerjavo vseh parov naenkrat.
+"""
+import numpy as np
+
+import model
+import stolpci
+from povezava import povezave
+
+
+class Matrika:
+    """
+    Razred za primerjave vseh parov voznikov v eni sezoni.
+    Element [i, j] opisuje voznika i v primerjavi z voznikom j.
+
+    Polja:
+    - leto: sezona
+    - vozniki: seznam voznikov, urejen po id-ju
+    - nastopi: število eventov, na katerih sta nastopila oba
+    - pred: kolikokrat je bil voznik i pred voznikom j
+    - razlika_mest: povprečna razlika mest (NaN, če nista bila nikoli uvrščena skupaj)
+    - razlika_tock: razlika točk na skupnih eventih
+    - razlika_casa: povprečna razlika časov v sekundah (NaN, če skupnih časov ni)
+    """
+
+    def __init__(self, leto, vozniki, nastopi, pred, razlika_mest, razlika_tock, razlika_casa):
+        """
+        Konstruktor matrike.
+        """
+        self.leto = leto
+        self.vozniki = vozniki
+        self.nastopi = nastopi
+        self.pred = pred
+        self.razlika_mest = razlika_mest
+        self.razlika_tock = razlika_tock
+        self.razlika_casa = razlika_casa
+
+    def primerjava(self, i, j):
+        """
+        Vrne primerjavo (model.Primerjava) voznika i z voznikom j.
+        """
+        def ali_none(vrednost):
+            return None if np.isnan(vrednost) else float(vrednost)
+
+        return model.Primerjava(
+            self.vozniki[i], self.vozniki[j],
+            int(self.nastopi[i, j]), int(self.pred[i, j]), int(self.pred[j, i]),
+            ali_none(self.razlika_mest[i, j]), int(self.razlika_tock[i, j]),
+            ali_none(self.razlika_casa[i, j]),
+        )
+
+
+def vsote_razlik(vrednosti, prisotni):
+    """
+    Za tabelo vrednosti oblike (eventi, vozniki) vrne število skupnih
+    eventov in vsoto razlik vrednosti za vse pare voznikov.
+    Odsotne vrednosti so NaN, prisotni pa pove, kje vrednosti obstajajo.
+    """
+    prisotni = prisotni.astype(np.float64)
+    vrednosti = np.where(np.isnan(vrednosti), 0, vrednosti)
+    # vsota po eventih, kjer sta i in j prisotna, vrednosti_i - vrednosti_j
+    return prisotni.T @ prisotni, vrednosti.T @ prisotni - prisotni.T @ vrednosti
+
+
+def povprecje(vsota, stevilo):
+    """
+    Vrne vsoto, deljeno s številom, oziroma NaN, kjer je število 0.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(stevilo > 0, vsota / stevilo, np.nan)
+
+
+def izracunaj(leto):
+    """
+    Vrne matriko primerjav za dano sezono ali None, če v njej ni rezultatov.
+    """
+    s = stolpci.shramba()
+    vrstice = np.flatnonzero(s.leto == leto)
+    if not len(vrstice):
+        return None
+    _, event = np.unique(s.event[vrstice], return_inverse=True)
+    idji, voznik = np.unique(s.voznik[vrstice], return_inverse=True)
+    oblika = (event.max() + 1, len(idji))
+
+    def tabela(vrednosti):
+        razporejene = np.full(oblika, np.nan)
+        razporejene[event, voznik] = vrednosti
+        return razporejene
+
+    nastopil = np.zeros(oblika, dtype=bool)
+    nastopil[event, voznik] = True
+    # neuvrščeni (mesto 0) nimajo mesta, s katerim bi jih primerjali
+    mesta = s.mesto[vrstice]
+    mesta = tabela(np.where(mesta > 0, mesta, np.nan))
+    tocke, casi = tabela(s.tocke[vrstice]), tabela(s.cas[vrstice])
+
+    nastopi, razlika_tock = vsote_razlik(tocke, nastopil)
+    uvrstitve, razlika_mest = vsote_razlik(mesta, ~np.isnan(mesta))
+    casovni, razlika_casa = vsote_razlik(casi, ~np.isnan(casi))
+    # primerjave z NaN so neresnične, zato neuvrščeni niso pred nikomer
+    pred = (mesta[:, :, None] < mesta[:, None, :]).sum(axis=0)
+    return Matrika(
+        leto,
+        [stolpci.Voznik(s.vozniki[id], id=id) for id in idji.tolist()],
+        np.rint(nastopi).astype(np.int64),
+        pred,
+        povprecje(razlika_mest, uvrstitve),
+        np.rint(razlika_tock).astype(np.int64),
+        povprecje(razlika_casa, casovni),
+    )
+
+
+# izračunane matrike {leto: Matrika}, veljavne za generacijo baze _generacija
+_matrike = {}
+_generacija = None
+
+
+def matrika(leto):
+    """
+    Vrne matriko primerjav dane sezone ali None, če sezona nima rezultatov.
+    Izračun se hrani, dokler se baza ne spremeni.
+    """
+    global _matrike, _generacija
+    generacija = povezave.generacija()
+    if generacija != _generacija:
+        _matrike, _generacija = {}, generacija
+    if leto not in _matrike:
+        _matrike[leto] = izracunaj(leto)
+    return _matrike[leto]
@@ -0,0 +1,165 @@
+"""
+Prvenstvena lestvica voznikov in ekip po vsakem krogu sezone.
+
+Rezultati sezon se naložijo v tabele NumPy, točke in zmage po krogih pa
+se izračunajo s kumulativnimi vsotami. Ob enakem številu točk odloča
+število zmag, ob enakem številu obojega si tekmovalca delita mesto.
+"""
+import numpy as np
+
+from model import KRONOLOSKO
+from povezava import povezave
+
+
+class Lestvica:
+    """
+    Razred za lestvico tekmovalcev (voznikov ali ekip) po krogih ene sezone.
+
+    Polja:
+    - imena: seznam imen tekmovalcev
+    - tocke, zmage, mesta: tabele oblike (krogi, tekmovalci) s stanjem po vsakem krogu
+    """
+
+    def __init__(self, imena, tocke_krogov, zmage_krogov):
+        """
+        Konstruktor lestvice iz točk in zmag, doseženih v posameznih krogih.
+        """
+        self.imena = imena
+        self.tocke = np.cumsum(tocke_krogov, axis=0)
+        self.zmage = np.cumsum(zmage_krogov, axis=0)
+        self.mesta = razvrsti(self.tocke, self.zmage)
+
+    def po_krogu(self, krog=-1):
+        """
+        Vrne stanje po danem krogu (privzeto po zadnjem) kot seznam
+        četveric (mesto, ime, točke, zmage), urejen po mestih.
+        """
+        if not self.imena:
+            return []
+        mesta, tocke, zmage = self.mesta[krog], self.tocke[krog], self.zmage[krog]
+        vrstni_red = np.lexsort((self.imena, mesta))
+        return [(int(mesta[i]), self.imena[i], int(tocke[i]), int(zmage[i])) for i in vrstni_red]
+
+
+class Sezona:
+    """
+    Razred za prvenstvo ene sezone.
+
+    Polja:
+    - leto: sezona
+    - krogi: seznam parov (id eventa, ime proge) v kronološkem vrstnem redu
+    - vozniki, ekipe: lestvici voznikov in ekip
+    """
+
+    def __init__(self, leto, krogi, vozniki, ekipe):
+        """
+        Konstruktor sezone.
+        """
+        self.leto = leto
+        self.krogi = krogi
+        self.vozniki = vozniki
+        self.ekipe = ekipe
+
+
+def razvrsti(tocke, zmage):
+    """
+    Vrne mesta tekmovalcev po vsakem krogu (vrstici).
+    Višje je mesto z več točkami, ob enakih točkah pa tisto z več zmagami.
+    """
+    if tocke.size == 0:
+        return np.zeros(tocke.shape, dtype=np.int64)
+    kljuc = tocke * (int(zmage.max()) + 1) + zmage
+    vrstni_red = np.argsort(-kljuc, axis=1, kind="stable")
+    urejeni = np.take_along_axis(kljuc, vrstni_red, axis=1)
+    # enaki ključi dobijo mesto prvega v skupini
+    polozaj = np.arange(1, kljuc.shape[1] + 1)
+    novi = np.ones(urejeni.shape, dtype=bool)
+    novi[:, 1:] = urejeni[:, 1:] != urejeni[:, :-1]
+    mesta_urejenih = np.maximum.accumulate(np.where(novi, polozaj, 0), axis=1)
+    mesta = np.empty_like(mesta_urejenih)
+    np.put_along_axis(mesta, vrstni_red, mesta_urejenih, axis=1)
+    return mesta
+
+
+def sestej(krog, tekmovalec, tocke, zmaga, st_krogov):
+    """
+    Iz vrstic rezultatov, podanih s tabelami krogov, id-jev tekmovalcev,
+    točk in zmag, vrne urejene id-je tekmovalcev ter točke in zmage vsakega
+    tekmovalca v vsakem krogu.
+    """
+    idji, stolpec = np.unique(tekmovalec, return_inverse=True)
+    tocke_krogov = np.zeros((st_krogov, len(idji)), dtype=np.int64)
+    zmage_krogov = np.zeros((st_krogov, len(idji)), dtype=np.int64)
+    np.add.at(tocke_krogov, (krog, stolpec), tocke)
+    np.add.at(zmage_krogov, (krog, stolpec), zmaga)
+    return idji, tocke_krogov, zmage_krogov
+
+
+def izracunaj(leta):
+    """
+    Vrne slovar {leto: Sezona} za dane sezone.
+    Vse sezone se naložijo z eno poizvedbo.
+    """
+    leta = sorted(set(leta))
+    if not leta:
+        return {}
+    conn = povezave.beri()
+    oznake = ", ".join("?" * len(leta))
+    eventi = conn.execute(f"""
+        SELECT event.id, event.leto, proga.ime_proge FROM event
+            JOIN proga ON proga.id = event.id_proge
+        WHERE event.leto IN ({oznake})
+        ORDER BY event.leto, {KRONOLOSKO}
+    """, leta).fetchall()
+    vrstice = np.array(conn.execute(f"""
+        SELECT rezultat.event_id, rezultat.voznik_id, rezultat.ekipa_id,
+               COALESCE(rezultat.tocke, 0), COALESCE(rezultat.mesto = 1, 0)
+        FROM rezultat
+            JOIN event ON event.id = rezultat.event_id
+        WHERE event.leto IN ({oznake})
+    """, leta).fetchall(), dtype=np.int64).reshape(-1, 5)
+    vozniki = dict(conn.execute("SELECT id, ime_priimek FROM voznik"))
+    ekipe = dict(conn.execute("SELECT id, ime FROM ekipa"))
+
+    # zaporedna številka kroga vsakega eventa znotraj njegove sezone
+    krogi_sezon = {leto: [] for leto in leta}
+    for event_id, leto, ime in eventi:
+        krogi_sezon[leto].append((event_id, ime))
+    event_id = np.array([e[0] for e in eventi], dtype=np.int64)
+    event_leto = np.array([e[1] for e in eventi], dtype=np.int64)
+    event_krog = np.concatenate([np.arange(len(krogi_sezon[leto])) for leto in leta])
+    urejeni = np.argsort(event_id)
+    indeks = urejeni[np.searchsorted(event_id, vrstice[:, 0], sorter=urejeni)]
+    leto_vrstice, krog_vrstice = event_leto[indeks], event_krog[indeks]
+
+    sezone = {}
+    for leto in leta:
+        izbrane = leto_vrstice == leto
+        krog, tocke, zmaga = krog_vrstice[izbrane], vrstice[izbrane, 3], vrstice[izbrane, 4]
+        st_krogov = len(krogi_sezon[leto])
+        lestvici = []
+        for stolpec, imena in ((1, vozniki), (2, ekipe)):
+            idji, tocke_krogov, zmage_krogov = sestej(krog, vrstice[izbrane, stolpec], tocke, zmaga, st_krogov)
+            lestvici.append(Lestvica([imena.get(int(i)) for i in idji], tocke_krogov, zmage_krogov))
+        sezone[leto] = Sezona(leto, krogi_sezon[leto], *lestvici)
+    return sezone
+
+
+# izračunane sezone {leto: Sezona}, veljavne za generacijo baze _generacija
+_sezone = {}
+_generacija = None
+
+
+def sezona(leto):
+    """
+    Vrne prvenstvo dane sezone ali None, če sezona nima eventov.
+    Izračun se hrani, dokler se baza ne spremeni.
+    """
+    global _sezone, _generacija
+    generacija = povezave.generacija()
+    if generacija != _generacija:
+        _sezone, _generacija = {}, generacija
+    if leto not in _sezone:
+        _sezone.update(izracunaj([leto]))
+    izracunana = _sezone[leto]
+    return izracunana if izracunana.krogi else None
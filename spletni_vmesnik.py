@@ -1,112 +1,320 @@
+import functools
+import json
+import mimetypes
+import os
+import sys
 import bottle
 from bottle import request, response, redirect
+# razredi modela; ustvari_aplikacijo(shramba=True) jih zamenja z razredi iz stolpci.py
 from model import Voznik, Ekipa, Proga, Event
+from povezava import povezave
+from predpomnilnik import Predpomnilnik
+import staticne
+import prvenstvo
+import primerjava
+import tempo
+import baza
 import sqlite3
 
 SECRET = "ZAMENJAJ_ME_S_TAJNOSTJO"  # TODO: nastavi močan skrivni ključ
-DB_PATH = "baza.db"
-
-
-def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("PRAGMA foreign_keys = ON")
-    return conn
-
-
-@bottle.get('/')
+VELIKOST_STRANI = 50  # rezultatov na stran v administraciji
+NAJVECJA_VELIKOST_STRANI = 500
+
+API_VELIKOST_STRANI = 100
+API_NAJVECJA_VELIKOST_STRANI = 1000
+IZVOZ_PAKET = 1000  # vrstic na en fetchmany pri izvozu
+
+# vir API-ja: (razred modela, polja, ki jih lahko izberemo)
+API_VIRI = {
+    "vozniki": (Voznik, ["id", "ime_priimek"]),
+    "ekipe": (Ekipa, ["id", "ime"]),
+    "proge": (Proga, ["id", "ime", "drzava"]),
+    "eventi": (Event, ["id", "ime", "leto"]),
+}
+
+aplikacija = bottle.Bottle()
+bottle.BaseTemplate.defaults["staticno"] = staticne.staticno
+strani = Predpomnilnik(povezave.generacija)
+
+
+def ustvari_aplikacijo(pot=None, shramba=False):
+    """
+    Vrne aplikacijo WSGI, po potrebi nastavljeno na drugo bazo.
+    Povezave z bazo se odprejo šele ob prvi zahtevi v vsaki niti oziroma procesu.
+    S shramba=True strani rezultate berejo iz stolpčne shrambe v pomnilniku.
+    """
+    if pot is not None and pot != povezave.pot:
+        povezave.nastavi(pot)
+        strani.izprazni()
+    # shema se preveri še pred razcepom procesov strežnika, ne ob prvi zahtevi
+    povezave.pripravi()
+    if shramba:
+        uporabi_shrambo()
+    return aplikacija
+
+
+def uporabi_shrambo():
+    """
+    Razrede modela zamenja z razredi iz stolpci.py, ki rezultate berejo iz shrambe.
+    """
+    global Voznik, Ekipa, Proga, Event
+    import stolpci
+    Voznik, Ekipa, Proga, Event = stolpci.Voznik, stolpci.Ekipa, stolpci.Proga, stolpci.Event
+    for vir, (razred, polja) in API_VIRI.items():
+        API_VIRI[vir] = (getattr(stolpci, razred.__name__), polja)
+
+
+def pogojno(funkcija):
+    """
+    Dekorator za javne strani, ki se spremenijo le ob spremembi baze.
+    Odgovoru doda ETag in Last-Modified glede na generacijo baze, na
+    pogojno zahtevo z ujemajočo različico pa vrne 304 brez poizvedb po
+    podatkih. Ostane en PRAGMA data_version na zahtevo (glej
+    Povezave.stanje), saj bazo spreminjajo tudi drugi procesi strežnika
+    in sprotni uvoz, ki jih generacija v pomnilniku procesa ne bi videla.
+    """
+    @functools.wraps(funkcija)
+    def ovoj(*args, **kwargs):
+        generacija, spremenjeno = povezave.stanje()
+        etag = f'"{generacija}"'
+        glave = {
+            "ETag": etag,
+            "Last-Modified": bottle.http_date(spremenjeno),
+            # posredniki smejo stran hraniti, a jo morajo pred uporabo preveriti
+            "Cache-Control": "no-cache",
+        }
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            ujemanje = if_none_match.strip() == "*" or etag in [
+                oznaka.strip().removeprefix("W/") for oznaka in if_none_match.split(",")]
+        elif if_modified_since is not None:
+            cas = bottle.parse_date(if_modified_since.split(";")[0].strip())
+            ujemanje = cas is not None and cas >= int(spremenjeno)
+        else:
+            ujemanje = False
+        if ujemanje:
+            return bottle.HTTPResponse(status=304, **glave)
+        for ime, vrednost in glave.items():
+            response.set_header(ime, vrednost)
+        return funkcija(*args, **kwargs)
+    return ovoj
+
+
+def oznaci(*oznake):
+    """
+    Označi, katere entitete prikazuje trenutno izrisana stran.
+    """
+    request.environ.setdefault("motogp.oznake", set()).update(oznake)
+
+
+def predpomni(funkcija):
+    """
+    Dekorator, ki izrisano stran hrani v predpomnilniku strani.
+    Ključ je pot skupaj s parametri, oznake pa nastavi stran s klicem oznaci.
+    """
+    @functools.wraps(funkcija)
+    def ovoj(*args, **kwargs):
+        kljuc = (request.path, request.query_string)
+        stran = strani.dobi(kljuc)
+        if stran is not None:
+            return stran
+        generacija = povezave.generacija()
+        stran = funkcija(*args, **kwargs)
+        if isinstance(stran, str) and response.status_code == 200:
+            strani.shrani(kljuc, stran, request.environ.get("motogp.oznake", ()), generacija)
+        return stran
+    return ovoj
+
+
+def oznake_rezultatov(conn, pogoj, parametri):
+    """
+    Vrne oznake strani, ki prikazujejo rezultate, izbrane s pogojem.
+    """
+    oznake = {"lestvica"}
+    for voznik_id, ekipa_id, event_id, proga_id in conn.execute(f"""
+        SELECT DISTINCT rezultat.voznik_id, rezultat.ekipa_id, rezultat.event_id, event.id_proge
+        FROM rezultat
+        LEFT JOIN event ON event.id = rezultat.event_id
+        WHERE {pogoj}
+    """, parametri):
+        oznake.update({f"voznik:{voznik_id}", f"ekipa:{ekipa_id}", f"event:{event_id}", f"proga:{proga_id}"})
+    return oznake
+
+
+def posodobi_ocene(conn, eventi, izbrisani=()):
+    """
+    Posodobi ocene voznikov po spremembi podanih eventov in pred brisanjem eventov iz izbrisani.
+    Vrne oznake strani voznikov, katerih zgodovina ocen se je spremenila.
+    """
+    return {f"voznik:{voznik_id}" for voznik_id in baza.Ocena(conn).uporabi(eventi, izbrisani)}
+
+
+@aplikacija.get('/')
+@pogojno
 def naslovna_stran():
     return bottle.template('naslovna_stran.html', napaka=None)
 
 
-@bottle.get('/static/<pot:path>')
+def sprejme_gzip(glava):
+    """
+    Vrne, ali glava Accept-Encoding dovoljuje kodiranje gzip, torej ga
+    navaja (ali navaja *) z vrednostjo q, večjo od 0.
+    """
+    utezi = {}
+    for del_glave in glava.split(","):
+        kodiranje, *parametri = del_glave.split(";")
+        q = 1.0
+        for parameter in parametri:
+            ime, _, vrednost = parameter.partition("=")
+            if ime.strip().lower() == "q":
+                try:
+                    q = float(vrednost)
+                except ValueError:
+                    q = 0.0
+        utezi[kodiranje.strip().lower()] = q
+    return utezi.get("gzip", utezi.get("*", 0.0)) > 0
+
+
+@aplikacija.get('/static/<pot:path>')
 def vrni_staticno(pot):
-    return bottle.static_file(pot, root="static")
+    if not pot.startswith("zgrajeno/"):
+        return bottle.static_file(pot, root=staticne.IZVOR)
+    if (sprejme_gzip(request.headers.get("Accept-Encoding", ""))
+            and os.path.isfile(os.path.join(staticne.IZVOR, pot + ".gz"))):
+        vrsta, _ = mimetypes.guess_type(pot)
+        odgovor = bottle.static_file(pot + ".gz", root=staticne.IZVOR, mimetype=vrsta or "application/octet-stream")
+        odgovor.set_header("Content-Encoding", "gzip")
+    else:
+        odgovor = bottle.static_file(pot, root=staticne.IZVOR)
+    # stisnjena in nestisnjena različica imata isti naslov
+    odgovor.set_header("Vary", "Accept-Encoding")
+    if odgovor.status_code < 400:
+        # označene datoteke se ne spreminjajo, zato jih brskalnik hrani neomejeno
+        odgovor.set_header("Cache-Control", "public, max-age=31536000, immutable")
+    return odgovor
 
 
 #vozniki
-@bottle.get('/voznik/')
+@aplikacija.get('/voznik/')
+@pogojno
+@predpomni
 def isci_voznika():
+    oznaci("vozniki")
     iskalni_niz = bottle.request.query.getunicode('iskalni_niz')
-    vozniki = list(Voznik.poisci(""))
+    vozniki = list(Voznik.poisci(iskalni_niz or ""))
     if iskalni_niz:
-        filtrirani_vozniki = [voznik for voznik in vozniki if iskalni_niz.lower() in voznik.ime_priimek.lower()]
-        vozniki = filtrirani_vozniki or ["Tega voznika ni v bazi!"]
+        vozniki = vozniki or ["Tega voznika ni v bazi!"]
     return bottle.template('voznik.html', iskalni_niz=iskalni_niz, vozniki=vozniki)
 
 
-@bottle.get('/voznik/<priimek>/')
+@aplikacija.get('/voznik/<priimek>/')
+@pogojno
+@predpomni
 def tocke_in_zmage_voznika(priimek):
-    vozniki = Voznik.poisci(priimek)
-    tocke, zmage, profil, ekipe = [], [], [], []
-    for voznik in vozniki:
-        tocke.extend(voznik.poisci_tocke())
-        zmage.extend(voznik.poisci_zmage())
-        profil.append((voznik.poisci_skupno_st_nastopov(),
-                       voznik.poisci_skupno_st_zmag(),
-                       voznik.poisci_skupno_st_stopnick(),
-                       voznik.poisci_skupno_st_tock()))
-        ekipe.extend(voznik.poisci_ekipe())
+    vozniki = list(Voznik.poisci(priimek))
+    oznaci("vozniki", *(f"voznik:{voznik.id}" for voznik in vozniki))
+    if not vozniki:
+        return "Tega voznika ni v bazi!"
+    profili = Voznik.poisci_profile(vozniki).values()
+    tocke = [podatek for p in profili for podatek in p.poisci_tocke()]
+    profil = [(p.nastopi, p.zmage, p.stopnicke, p.tocke) for p in profili]
+    ekipe = [podatek for p in profili for podatek in p.ekipe]
+    zmage = list(Voznik.poisci_zmage_voznikov(vozniki))
+    ocene = list(vozniki[-1].poisci_ocene())
     return bottle.template('voznik_statistika.html',
-                           tocke=tocke, voznik=voznik, zmage=zmage, profil=profil, ekipe=ekipe)
+                           tocke=tocke, voznik=vozniki[-1], zmage=zmage, profil=profil, ekipe=ekipe, ocene=ocene)
+
+
+@aplikacija.get('/primerjava/')
+@pogojno
+@predpomni
+def primerjava_voznikov():
+    oznaci("vozniki")
+    imeni = [request.query.getunicode(ime) or "" for ime in ('voznik', 'drugi')]
+    vozniki = [next(iter(Voznik.poisci(ime)), None) if ime.strip() else None for ime in imeni]
+    oznaci(*(f"voznik:{voznik.id}" for voznik in vozniki if voznik is not None))
+    primerjava_para = None
+    if None not in vozniki:
+        primerjava_para = vozniki[0].poisci_primerjavo(vozniki[1])
+    return bottle.template('primerjava.html', imeni=imeni, vozniki=vozniki, primerjava=primerjava_para)
 
 
 #proge
-@bottle.get('/proga/')
+@aplikacija.get('/proga/')
+@pogojno
+@predpomni
 def isci_progo():
+    oznaci("proge")
     iskalni_niz = bottle.request.query.getunicode('iskalni_niz')
-    proge = list(Proga.poisci(""))
+    proge = list(Proga.poisci(iskalni_niz or ""))
     if iskalni_niz:
-        filtrirane_proge = [proga for proga in proge if iskalni_niz.lower() in proga.ime.lower()]
-        proge = filtrirane_proge or ["Te proge ni v bazi!"]
+        proge = proge or ["Te proge ni v bazi!"]
     return bottle.template('proga.html', iskalni_niz=iskalni_niz, proge=proge)
 
 
-@bottle.get('/proga/<ime>/')
+@aplikacija.get('/proga/<ime>/')
+@pogojno
+@predpomni
 def top3_proge(ime):
     proge = list(Proga.poisci(ime))
+    oznaci("proge")
     if not proge:
         return "Ta proga ne obstaja!"
     proga = proge[0]
+    oznaci(f"proga:{proga.id}")
     top3 = list(proga.poisci_top3())
     return bottle.template('proga_statistika.html', top3=top3, proga=proga)
 
 
 #eventi
-@bottle.get('/event/')
+@aplikacija.get('/event/')
+@pogojno
+@predpomni
 def seznam_eventov():
-    eventi = list(Event.poisci_evente_v_letu("%"))
+    oznaci("eventi")
+    eventi = list(Event.poisci_vse())
     return bottle.template('eventi.html', eventi=eventi)
 
 
-@bottle.get('/event/')
+@aplikacija.get('/event/')
+@pogojno
+@predpomni
 def seznam_eventov_dropdown():
-    eventi = list(Event.poisci_evente_v_letu("%"))
+    oznaci("eventi")
+    eventi = list(Event.poisci_vse())
     return bottle.template('event_dropdown.html', eventi=eventi)
 
 
-@bottle.get('/event/<id:int>/')
+@aplikacija.get('/event/<id:int>/')
+@pogojno
+@predpomni
 def event_rezultat(id):
-    event_obj = next((e for e in Event.poisci_evente_v_letu("%") if e.id == id), None)
+    oznaci("eventi", f"event:{id}")
+    event_obj = Event.poisci_po_id(id)
     if not event_obj:
         return "Event ne obstaja!"
     proga, voznik, cas = event_obj.poisci_najhitrejsi_krog() or (None, None, None)
-    vse_proge = list(Proga.poisci(""))
-    return bottle.template('event.html', event=event_obj, proga=proga, voznik=voznik, cas=cas, proge=vse_proge)
+    return bottle.template('event.html', event=event_obj, proga=proga, voznik=voznik, cas=cas)
 
 
 #ekipe
-@bottle.get('/ekipa/')
+@aplikacija.get('/ekipa/')
+@pogojno
+@predpomni
 def isci_ekipo():
+    oznaci("ekipe")
     iskalni_niz = bottle.request.query.getunicode('iskalni_niz')
-    ekipe = list(Ekipa.poisci(""))
-    if iskalni_niz:
-        ekipe = [ekipa for ekipa in ekipe if iskalni_niz.lower() in ekipa.ime.lower()]
+    ekipe = list(Ekipa.poisci(iskalni_niz or ""))
     return bottle.template('ekipa.html', iskalni_niz=iskalni_niz, ekipe=ekipe)
 
 
-@bottle.get('/ekipa/<ime>/')
+@aplikacija.get('/ekipa/<ime>/')
+@pogojno
+@predpomni
 def voznik_in_leto_ekipe(ime):
     ekipe = list(Ekipa.poisci(ime))
+    oznaci("ekipe", *(f"ekipa:{ekipa.id}" for ekipa in ekipe[:1]))
     if not ekipe:
         return f"Ekipa {ime} ne obstaja!"
     ekipa = ekipe[0]
@@ -114,19 +322,253 @@ def voznik_in_leto_ekipe(ime):
     return bottle.template('ekipa_vse.html', vozniki=vozniki, ekipa=ekipa)
 
 
-@bottle.get('/ekipe/')
+@aplikacija.get('/ekipe/')
+@pogojno
+@predpomni
 def lestvica_ekip():
-    vse_ekipe = list(Ekipa.poisci(""))
-    lestvica = []
-    for ekipa in vse_ekipe:
-        skupno, najboljsi_voznik = ekipa.poisci_skupne_tocke_in_najboljsi_voznik()
-        lestvica.append((ekipa.ime, skupno, najboljsi_voznik))
-    lestvica.sort(key=lambda x: x[1] or 0, reverse=True)
-    return bottle.template('ekipe_lestvica.html', lestvica=lestvica)
+    oznaci("lestvica", "eventi")
+    leto = bottle.request.query.get('leto', type=int)
+    lestvica = Ekipa.poisci_lestvico(leto)
+    leta = [leto for leto, in Event.poisci_leto()]
+    return bottle.template('ekipe_lestvica.html', lestvica=lestvica, leta=leta, leto=leto)
+
+
+#sezone
+@aplikacija.get('/sezona/<leto:int>/')
+@pogojno
+@predpomni
+def prvenstvo_sezone(leto):
+    oznaci("lestvica", "eventi")
+    sezona = prvenstvo.sezona(leto)
+    if sezona is None:
+        return f"Sezone {leto} ni v bazi!"
+    leta = [leto for leto, in Event.poisci_leto()]
+    return bottle.template('sezona.html', sezona=sezona, leta=leta)
+
+
+@aplikacija.get('/sezona/<leto:int>/primerjave/')
+@pogojno
+@predpomni
+def primerjave_sezone(leto):
+    oznaci("lestvica", "vozniki")
+    matrika = primerjava.matrika(leto)
+    if matrika is None:
+        return f"Sezone {leto} ni v bazi!"
+    sotekmovalci = list(Voznik.poisci_primerjave_sotekmovalcev(leto))
+    leta = [leto for leto, in Event.poisci_leto()]
+    return bottle.template('sezona_primerjave.html', matrika=matrika, sotekmovalci=sotekmovalci, leta=leta)
+
+
+@aplikacija.get('/sezona/<leto:int>/tempo/')
+@pogojno
+@predpomni
+def tempo_sezone(leto):
+    oznaci("lestvica", "eventi")
+    analiza = tempo.sezona(leto)
+    if analiza is None:
+        return f"Za sezono {leto} ni časov!"
+    leta = [leto for leto, in Event.poisci_leto()]
+    return bottle.template('sezona_tempo.html', analiza=analiza, leta=leta, percentili=tempo.PERCENTILI)
+
+
+#api
+def izberi_polja(vsa_polja):
+    """
+    Vrne polja, izbrana s parametrom polja, ali vsa polja, če ga ni.
+    """
+    polja = request.query.getunicode('polja')
+    if not polja:
+        return vsa_polja
+    polja = [polje.strip() for polje in polja.split(",")]
+    neznana = [polje for polje in polja if polje not in vsa_polja]
+    if neznana:
+        bottle.abort(400, f"Neznana polja: {', '.join(neznana)}.")
+    return polja
+
+
+@aplikacija.get('/api/<vir>/')
+@pogojno
+def api_seznam(vir):
+    if vir not in API_VIRI:
+        bottle.abort(404, f"Vir {vir} ne obstaja.")
+    razred, vsa_polja = API_VIRI[vir]
+    polja = izberi_polja(vsa_polja)
+    po = request.query.get('po', 0, type=int)
+    velikost = min(max(request.query.get('velikost', API_VELIKOST_STRANI, type=int), 1),
+                   API_NAJVECJA_VELIKOST_STRANI)
+    objekti = list(razred.poisci_stran(po, velikost))
+    return {
+        "podatki": [{polje: getattr(objekt, polje) for polje in polja} for objekt in objekti],
+        # naslednjo stran dobimo s ?po=<naslednji>
+        "naslednji": objekti[-1].id if len(objekti) == velikost else None,
+    }
+
+
+@aplikacija.get('/api/vozniki/<id:int>/profil')
+@pogojno
+def api_profil_voznika(id):
+    voznik = Voznik.poisci_po_id(id)
+    if voznik is None:
+        bottle.abort(404, f"Voznik z ID {id} ne obstaja.")
+    profil = voznik.poisci_profil()
+    return {
+        "id": voznik.id,
+        "ime_priimek": voznik.ime_priimek,
+        "nastopi": profil.nastopi,
+        "zmage": profil.zmage,
+        "stopnicke": profil.stopnicke,
+        "tocke": profil.tocke,
+        "sezone": [{"leto": leto, "tocke": tocke, "zmage": zmage}
+                   for leto, (tocke, zmage) in profil.sezone.items()],
+        "ekipe": [{"ekipa": ekipa, "leto": leto} for ekipa, leto in profil.ekipe],
+    }
+
+
+@aplikacija.get('/api/sezona/<leto:int>')
+@pogojno
+def api_prvenstvo_sezone(leto):
+    sezona = prvenstvo.sezona(leto)
+    if sezona is None:
+        bottle.abort(404, f"Sezone {leto} ni v bazi.")
+
+    def tekmovalci(lestvica):
+        return [
+            {
+                "ime": ime,
+                "tocke": lestvica.tocke[:, i].tolist(),
+                "zmage": lestvica.zmage[:, i].tolist(),
+                "mesta": lestvica.mesta[:, i].tolist(),
+            }
+            for i, ime in enumerate(lestvica.imena)
+        ]
+
+    return {
+        "leto": sezona.leto,
+        "krogi": [{"event_id": event_id, "proga": ime} for event_id, ime in sezona.krogi],
+        "vozniki": tekmovalci(sezona.vozniki),
+        "ekipe": tekmovalci(sezona.ekipe),
+    }
+
+
+def primerjava_v_slovar(primerjava_para):
+    """
+    Vrne primerjavo dveh voznikov kot slovar za JSON.
+    """
+    return {
+        "voznik": {"id": primerjava_para.voznik.id, "ime_priimek": primerjava_para.voznik.ime_priimek},
+        "drugi": {"id": primerjava_para.drugi.id, "ime_priimek": primerjava_para.drugi.ime_priimek},
+        "nastopi": primerjava_para.nastopi,
+        "pred": primerjava_para.pred,
+        "za": primerjava_para.za,
+        "razlika_mest": primerjava_para.razlika_mest,
+        "razlika_tock": primerjava_para.razlika_tock,
+        "razlika_casa": primerjava_para.razlika_casa,
+    }
+
+
+@aplikacija.get('/api/vozniki/<id:int>/primerjava/<drugi_id:int>')
+@pogojno
+def api_primerjava_voznikov(id, drugi_id):
+    vozniki = [Voznik.poisci_po_id(i) for i in (id, drugi_id)]
+    for i, voznik in zip((id, drugi_id), vozniki):
+        if voznik is None:
+            bottle.abort(404, f"Voznik z ID {i} ne obstaja.")
+    return primerjava_v_slovar(vozniki[0].poisci_primerjavo(vozniki[1]))
+
+
+@aplikacija.get('/api/sezona/<leto:int>/primerjave')
+@pogojno
+def api_primerjave_sezone(leto):
+    matrika = primerjava.matrika(leto)
+    if matrika is None:
+        bottle.abort(404, f"Sezone {leto} ni v bazi.")
+
+    def seznam(tabela):
+        # JSON ne pozna NaN
+        return [[None if vrednost != vrednost else vrednost for vrednost in vrstica]
+                for vrstica in tabela.tolist()]
+
+    return {
+        "leto": leto,
+        "vozniki": [{"id": voznik.id, "ime_priimek": voznik.ime_priimek} for voznik in matrika.vozniki],
+        "nastopi": matrika.nastopi.tolist(),
+        "pred": matrika.pred.tolist(),
+        "razlika_mest": seznam(matrika.razlika_mest),
+        "razlika_tock": matrika.razlika_tock.tolist(),
+        "razlika_casa": seznam(matrika.razlika_casa),
+        "sotekmovalci": [dict(primerjava_v_slovar(p), ekipa=ekipa)
+                         for ekipa, p in Voznik.poisci_primerjave_sotekmovalcev(leto)],
+    }
+
+
+@aplikacija.get('/api/sezona/<leto:int>/tempo')
+@pogojno
+def api_tempo_sezone(leto):
+    analiza = tempo.sezona(leto)
+    if analiza is None:
+        bottle.abort(404, f"Za sezono {leto} ni časov.")
+
+    def brez_nan(vrednost):
+        # JSON ne pozna NaN
+        return None if vrednost != vrednost else vrednost
+
+    def statistika(statistika_skupin):
+        return [
+            {
+                "ime": ime,
+                "casi": stevilo,
+                "zaostanek": zaostanek,
+                "percentili": dict(zip(map(str, tempo.PERCENTILI), percentili)),
+                "odklon": odklon,
+            }
+            for ime, stevilo, zaostanek, percentili, odklon in statistika_skupin.vrstice()
+        ]
+
+    return {
+        "leto": leto,
+        "eventi": [{"event_id": event_id, "proga": ime} for event_id, ime in analiza.eventi],
+        "vozniki": statistika(analiza.po_voznikih),
+        "ekipe": statistika(analiza.po_ekipah),
+        "po_eventih": statistika(analiza.po_eventih),
+        "zaostanki": {
+            voznik: [brez_nan(zaostanek) for zaostanek in stolpec]
+            for voznik, stolpec in zip(analiza.vozniki, analiza.zaostanki.T.tolist())
+        },
+    }
+
+
+@aplikacija.get('/api/rezultati.ndjson')
+@pogojno
+def api_izvoz_rezultatov():
+    response.content_type = 'application/x-ndjson; charset=UTF-8'
+
+    def vrstice():
+        # lastna povezava, da izvoz bere en sam posnetek baze
+        conn = povezave.odpri(samo_branje=True)
+        try:
+            cur = conn.execute("""
+                SELECT rezultat.id, rezultat.event_id, event.leto, proga.drzava, proga.ime_proge AS proga,
+                       voznik.ime_priimek AS voznik, ekipa.ime AS ekipa,
+                       rezultat.mesto, rezultat.tocke, rezultat.cas
+                FROM rezultat
+                JOIN event ON event.id = rezultat.event_id
+                JOIN proga ON proga.id = event.id_proge
+                JOIN voznik ON voznik.id = rezultat.voznik_id
+                JOIN ekipa ON ekipa.id = rezultat.ekipa_id
+                ORDER BY rezultat.id
+            """)
+            stolpci = [opis[0] for opis in cur.description]
+            while paket := cur.fetchmany(IZVOZ_PAKET):
+                yield "".join(json.dumps(dict(zip(stolpci, vrstica)), ensure_ascii=False) + "\n"
+                              for vrstica in paket)
+        finally:
+            conn.close()
+
+    return vrstice()
 
 
 #login in admin
-@bottle.route('/login', method=['GET', 'POST'])
+@aplikacija.route('/login', method=['GET', 'POST'])
 def login():
     if bottle.request.method == 'POST':
         username = bottle.request.forms.get('username')
@@ -139,43 +581,42 @@ def login():
     return bottle.template('login.html')
 
 
-@bottle.route('/admin')
+@aplikacija.route('/admin')
 def admin():
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
 
-    conn = get_conn()
-    cur = conn.cursor()
+    cur = povezave.beri().cursor()
 
     # Države
     cur.execute("SELECT DISTINCT drzava FROM proga")
     drzave = [row[0] for row in cur.fetchall()]
 
-    # Eventi
-    cur.execute("""
-        SELECT event.id, event.leto, proga.drzava
+    # Sezone, privzeto se prikaže zadnja
+    cur.execute("SELECT DISTINCT leto FROM event ORDER BY leto DESC")
+    leta = [row[0] for row in cur.fetchall()]
+    leto = request.query.get('leto', type=int)
+    if leto is None and leta:
+        leto = leta[0]
+
+    # Eventi izbrane sezone po krogih s povzetkom rezultatov; rezultati se naložijo sproti
+    cur.execute(f"""
+        SELECT
+            event.id,
+            event.leto,
+            proga.drzava,
+            COUNT(rezultat.id) AS st_rezultatov,
+            MAX(CASE WHEN rezultat.mesto = 1 THEN voznik.ime_priimek END) AS zmagovalec
         FROM event
         JOIN proga ON event.id_proge = proga.id
-        ORDER BY event.leto DESC
-    """)
+        LEFT JOIN rezultat ON rezultat.event_id = event.id
+        LEFT JOIN voznik ON voznik.id = rezultat.voznik_id
+        WHERE event.leto = ?
+        GROUP BY event.id
+        ORDER BY {baza.KRONOLOSKO}
+    """, (leto,))
     eventi = cur.fetchall()
 
-    # Rezultati po eventih
-    rezultati_po_eventih = {}
-    for e in eventi:
-        event_id = e[0]
-        cur.execute("""
-            SELECT rezultat.id, voznik.ime_priimek, ekipa.ime, rezultat.mesto, rezultat.cas, rezultat.tocke
-            FROM rezultat
-            JOIN voznik ON rezultat.voznik_id = voznik.id
-            JOIN ekipa ON rezultat.ekipa_id = ekipa.id
-            WHERE rezultat.event_id = ?
-            ORDER BY 
-                CASE WHEN rezultat.mesto IS NULL THEN 1 ELSE 0 END,
-                rezultat.mesto ASC
-        """, (event_id,))
-        rezultati_po_eventih[event_id] = cur.fetchall()
-
     # DOdamo voznike
     cur.execute("SELECT id, ime_priimek FROM voznik ORDER BY ime_priimek")
     vozniki = cur.fetchall()
@@ -184,19 +625,60 @@ def admin():
     cur.execute("SELECT id, ime FROM ekipa ORDER BY ime")
     ekipe = cur.fetchall()
 
-    conn.close()
-
     return bottle.template(
         'admin.html',
         drzave=drzave,
         eventi=eventi,
-        rezultati_po_eventih=rezultati_po_eventih,
+        leta=leta,
+        leto=leto,
         vozniki=vozniki,
-        ekipe=ekipe
+        ekipe=ekipe,
+        velikost_strani=VELIKOST_STRANI
     )
 
 
-@bottle.post('/add_event')
+@aplikacija.get('/admin/rezultati/<event_id:int>')
+def admin_rezultati(event_id):
+    if request.get_cookie("admin", secret=SECRET) != "true":
+        bottle.abort(401, "Potrebna je prijava.")
+
+    stran = max(request.query.get('stran', 1, type=int), 1)
+    velikost = min(max(request.query.get('velikost', VELIKOST_STRANI, type=int), 1), NAJVECJA_VELIKOST_STRANI)
+
+    conn = povezave.beri()
+    skupaj = conn.execute("SELECT COUNT(*) FROM rezultat WHERE event_id = ?", (event_id,)).fetchone()[0]
+    vrstice = conn.execute("""
+        SELECT rezultat.id, voznik.ime_priimek, ekipa.ime, rezultat.mesto, rezultat.cas, rezultat.tocke
+        FROM rezultat
+        JOIN voznik ON rezultat.voznik_id = voznik.id
+        JOIN ekipa ON rezultat.ekipa_id = ekipa.id
+        WHERE rezultat.event_id = ?
+        ORDER BY
+            CASE WHEN rezultat.mesto IS NULL THEN 1 ELSE 0 END,
+            rezultat.mesto ASC
+        LIMIT ? OFFSET ?
+    """, (event_id, velikost, (stran - 1) * velikost)).fetchall()
+
+    return {
+        "event_id": event_id,
+        "stran": stran,
+        "velikost": velikost,
+        "skupaj": skupaj,
+        "rezultati": [
+            {"id": id, "voznik": voznik, "ekipa": ekipa, "mesto": mesto, "cas": cas, "tocke": tocke}
+            for id, voznik, ekipa, mesto, cas, tocke in vrstice
+        ],
+    }
+
+
+@aplikacija.get('/admin/predpomnilnik')
+def admin_predpomnilnik():
+    if request.get_cookie("admin", secret=SECRET) != "true":
+        bottle.abort(401, "Potrebna je prijava.")
+    return strani.statistika()
+
+
+@aplikacija.post('/add_event')
 def add_event():
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
@@ -206,62 +688,80 @@ def add_event():
     except (TypeError, ValueError):
         return "<p>Neveljavno leto!</p><a href='/admin'>Nazaj</a>"
 
-    drzava = request.forms.get('drzava')
-
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # poišči progo
-    cur.execute("SELECT id FROM proga WHERE drzava=?", (drzava,))
-    proga = cur.fetchone()
-    if not proga:
-        conn.close()
-        return f"<p>Država {drzava} ne obstaja v bazi!</p><a href='/admin'>Nazaj</a>"
-    proga_id = proga[0]
-
-    # preveri, če event že obstaja
-    cur.execute("SELECT id FROM event WHERE leto=? AND id_proge=?", (leto, proga_id))
-    obstaja = cur.fetchone()
-    if obstaja:
-        conn.close()
-        return f"<p>Event za {drzava} {leto} že obstaja!</p><a href='/admin'>Nazaj</a>"
-
-    cur.execute("INSERT INTO event (leto, id_proge, najhitrejsi_cas) VALUES (?, ?, NULL)", (leto, proga_id))
-    conn.commit()
-    conn.close()
+    # brez kroga se event doda na konec sezone
+    krog = request.forms.get('krog') or None
+    if krog is not None:
+        if not krog.isdigit() or int(krog) < 1:
+            return "<p>Neveljaven krog!</p><a href='/admin'>Nazaj</a>"
+        krog = int(krog)
+
+    drzava = request.forms.getunicode('drzava')
+
+    with povezave.pisi() as conn:
+        cur = conn.cursor()
+
+        # poišči progo
+        cur.execute("SELECT id FROM proga WHERE drzava=?", (drzava,))
+        proga = cur.fetchone()
+        if not proga:
+            return f"<p>Država {drzava} ne obstaja v bazi!</p><a href='/admin'>Nazaj</a>"
+        proga_id = proga[0]
+
+        # preveri, če event že obstaja
+        cur.execute("SELECT id FROM event WHERE leto=? AND id_proge=?", (leto, proga_id))
+        obstaja = cur.fetchone()
+        if obstaja:
+            return f"<p>Event za {drzava} {leto} že obstaja!</p><a href='/admin'>Nazaj</a>"
+
+        if krog is None:
+            cur.execute("SELECT COALESCE(MAX(krog), 0) + 1 FROM event WHERE leto=?", (leto,))
+            krog = cur.fetchone()[0]
+        else:
+            # kasnejši krogi sezone se zamaknejo za enega
+            cur.execute("UPDATE event SET krog = krog + 1 WHERE leto=? AND krog >= ?", (leto, krog))
+        cur.execute("INSERT INTO event (leto, id_proge, najhitrejsi_cas, krog) VALUES (?, ?, NULL, ?)",
+                    (leto, proga_id, krog))
+        # nov event zamakne zaporedje kasnejših eventov v zgodovini ocen
+        oznake = {"eventi", f"proga:{proga_id}"} | posodobi_ocene(conn, [cur.lastrowid])
+    strani.razveljavi(*oznake)
     return redirect('/admin')
 
 
-@bottle.get('/delete_event/<id:int>/')
+@aplikacija.get('/delete_event/<id:int>/')
 def delete_event(id):
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
 
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM event WHERE id=?", (id,))
-    obstaja = cur.fetchone()
-    if not obstaja:
-        conn.close()
-        return f"<p>Event z ID {id} ne obstaja!</p><a href='/admin'>Nazaj</a>"
-
-    # Pobriši rezultate za ta event 
-    cur.execute("DELETE FROM rezultat WHERE event_id = ?", (id,))
-    cur.execute("DELETE FROM event WHERE id=?", (id,))
-    conn.commit()
-    conn.close()
+    with povezave.pisi() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM event WHERE id=?", (id,))
+        obstaja = cur.fetchone()
+        if not obstaja:
+            return f"<p>Event z ID {id} ne obstaja!</p><a href='/admin'>Nazaj</a>"
+
+        oznake = oznake_rezultatov(conn, "rezultat.event_id = ?", (id,))
+        oznake.update({"eventi", f"event:{id}"})
+        oznake.update(f"proga:{proga_id}" for proga_id, in
+                      cur.execute("SELECT id_proge FROM event WHERE id = ?", (id,)))
+
+        # Pobriši rezultate za ta event 
+        cur.execute("DELETE FROM rezultat WHERE event_id = ?", (id,))
+        # ocene se posodobijo pred brisanjem eventa, saj se nanj sklicujejo
+        oznake.update(posodobi_ocene(conn, [], izbrisani=[id]))
+        cur.execute("DELETE FROM event WHERE id=?", (id,))
+    strani.razveljavi(*oznake)
     return redirect('/admin')
 
 
-@bottle.post('/add_rezultat')
+@aplikacija.post('/add_rezultat')
 def add_rezultat():
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
 
     try:
         event_id = int(request.forms.get('event_id'))
-        voznik = (request.forms.get('voznik') or '').strip()
-        ekipa = (request.forms.get('ekipa') or '').strip()
+        voznik = (request.forms.getunicode('voznik') or '').strip()
+        ekipa = (request.forms.getunicode('ekipa') or '').strip()
         mesto_raw = request.forms.get('mesto')
         mesto = int(mesto_raw) if mesto_raw else None
         cas_raw = request.forms.get('cas')
@@ -274,91 +774,91 @@ def add_rezultat():
     if not voznik or not ekipa:
         return "<p>Voznik in ekipa sta obvezna!</p><a href='/admin'>Nazaj</a>"
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # PReveri event
-    cur.execute("SELECT id FROM event WHERE id=?", (event_id,))
-    if not cur.fetchone():
-        conn.close()
-        return f"<p>Event z ID {event_id} ne obstaja!</p><a href='/admin'>Nazaj</a>"
-
-    # voznik
-    cur.execute("SELECT id FROM voznik WHERE ime_priimek = ?", (voznik,))
-    row = cur.fetchone()
-    if row:
-        voznik_id = row[0]
-    else:
-        cur.execute("INSERT INTO voznik (ime_priimek) VALUES (?)", (voznik,))
-        voznik_id = cur.lastrowid
-
-    # ekipa
-    cur.execute("SELECT id FROM ekipa WHERE ime = ?", (ekipa,))
-    row = cur.fetchone()
-    if row:
-        ekipa_id = row[0]
-    else:
-        cur.execute("INSERT INTO ekipa (ime) VALUES (?)", (ekipa,))
-        ekipa_id = cur.lastrowid
-
-    # rezultat
-    cur.execute(
-        """
-        INSERT INTO rezultat (event_id, voznik_id, ekipa_id, mesto, tocke, cas)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (event_id, voznik_id, ekipa_id, mesto, tocke, cas)
-    )
-
-    conn.commit()
-    conn.close()
+    try:
+        with povezave.pisi() as conn:
+            cur = conn.cursor()
+
+            # PReveri event
+            cur.execute("SELECT id FROM event WHERE id=?", (event_id,))
+            if not cur.fetchone():
+                return f"<p>Event z ID {event_id} ne obstaja!</p><a href='/admin'>Nazaj</a>"
+
+            # voznik in ekipa (poišče obstoječega ali doda novega)
+            oznake = set()
+            if not cur.execute("SELECT 1 FROM voznik WHERE ime_priimek = ?", (voznik,)).fetchone():
+                oznake.add("vozniki")
+            if not cur.execute("SELECT 1 FROM ekipa WHERE ime = ?", (ekipa,)).fetchone():
+                oznake.add("ekipe")
+            voznik_id = baza.Voznik(conn).dodaj_vrstico(ime_priimek=voznik)
+            ekipa_id = baza.Ekipa(conn).dodaj_vrstico(ime=ekipa)
+
+            # rezultat
+            cur.execute(
+                """
+                INSERT INTO rezultat (event_id, voznik_id, ekipa_id, mesto, tocke, cas)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (event_id, voznik_id, ekipa_id, mesto, tocke, cas)
+            )
+            oznake.update(oznake_rezultatov(conn, "rezultat.id = ?", (cur.lastrowid,)))
+            oznake.update(posodobi_ocene(conn, [event_id]))
+    except sqlite3.IntegrityError:
+        return f"<p>Voznik {voznik} že ima rezultat na tem eventu!</p><a href='/admin'>Nazaj</a>"
+    strani.razveljavi(*oznake)
     return redirect('/admin')
 
 
-@bottle.get('/delete_rezultat/<id:int>/')
+@aplikacija.get('/delete_rezultat/<id:int>/')
 def delete_rezultat(id):
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
 
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM rezultat WHERE id = ?", (id,))
-    conn.commit()
-    conn.close()
+    with povezave.pisi() as conn:
+        oznake = oznake_rezultatov(conn, "rezultat.id = ?", (id,))
+        eventi = [event_id for event_id, in conn.execute("SELECT event_id FROM rezultat WHERE id = ?", (id,))]
+        conn.execute("DELETE FROM rezultat WHERE id = ?", (id,))
+        oznake.update(posodobi_ocene(conn, eventi))
+    strani.razveljavi(*oznake)
     return redirect('/admin')
 
-@bottle.get('/delete_voznik/<id:int>/')
+@aplikacija.get('/delete_voznik/<id:int>/')
 def delete_voznik(id):
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # Najprej izbrišemo vse rezultate za tega voznika
-    cur.execute("DELETE FROM rezultat WHERE voznik_id = ?", (id,))
-    # Nato izbrišemo voznika
-    cur.execute("DELETE FROM voznik WHERE id = ?", (id,))
-
-    conn.commit()
-    conn.close()
+    with povezave.pisi() as conn:
+        oznake = oznake_rezultatov(conn, "rezultat.voznik_id = ?", (id,))
+        oznake.update({"vozniki", f"voznik:{id}"})
+        eventi = [event_id for event_id, in conn.execute(
+            "SELECT DISTINCT event_id FROM rezultat WHERE voznik_id = ?", (id,))]
+        # Najprej izbrišemo vse rezultate za tega voznika
+        conn.execute("DELETE FROM rezultat WHERE voznik_id = ?", (id,))
+        # Ocene brez njegovih rezultatov ne vsebujejo več voznika
+        oznake.update(posodobi_ocene(conn, eventi))
+        # Nato izbrišemo voznika
+        conn.execute("DELETE FROM voznik WHERE id = ?", (id,))
+    strani.razveljavi(*oznake)
     return redirect('/admin')
 
-@bottle.get('/delete_ekipa/<id:int>/')
+@aplikacija.get('/delete_ekipa/<id:int>/')
 def delete_ekipa(id):
     if request.get_cookie("admin", secret=SECRET) != "true":
         return redirect('/login')
 
-    conn = get_conn()
-    cur = conn.cursor()
-
-    # Najprej izbrišemo vse rezultate za to ekipo
-    cur.execute("DELETE FROM rezultat WHERE ekipa_id = ?", (id,))
-    # Nato izbrišemo ekipo
-    cur.execute("DELETE FROM ekipa WHERE id = ?", (id,))
-
-    conn.commit()
-    conn.close()
+    with povezave.pisi() as conn:
+        oznake = oznake_rezultatov(conn, "rezultat.ekipa_id = ?", (id,))
+        oznake.update({"ekipe", "lestvica", f"ekipa:{id}"})
+        eventi = [event_id for event_id, in conn.execute(
+            "SELECT DISTINCT event_id FROM rezultat WHERE ekipa_id = ?", (id,))]
+        # Najprej izbrišemo vse rezultate za to ekipo
+        conn.execute("DELETE FROM rezultat WHERE ekipa_id = ?", (id,))
+        oznake.update(posodobi_ocene(conn, eventi))
+        # Nato izbrišemo ekipo
+        conn.execute("DELETE FROM ekipa WHERE id = ?", (id,))
+    strani.razveljavi(*oznake)
     return redirect('/admin')
 
-bottle.run(debug=True, reloader=True)
+
+if __name__ == "__main__":
+    # razvojni strežnik; za produkcijo glej streznik.py
+    bottle.run(app=ustvari_aplikacijo(shramba="--stolpci" in sys.argv), debug=True, reloader=True)
\ No newline at end of file
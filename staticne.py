@@ -0,0 +1,89 @@
+"""
+Priprava statičnih datotek za dolgotrajno predpomnjenje v brskalnikih.
+
+Uporaba:
+    python staticne.py
+
+Vsaka datoteka iz mape static se prepiše v static/zgrajeno pod imenom,
+ki vsebuje zgoščeno vsebine (npr. styles.3f2a9c1b0d4e.css), poleg nje
+pa se shrani še z gzip stisnjena različica, če je ta manjša. Preslikava
+izvirnih imen v nova se zapiše v static/zgrajeno/manifest.json. Ker se
+ime ob vsaki spremembi vsebine spremeni, smejo brskalniki datoteke
+hraniti neomejeno dolgo.
+"""
+import gzip
+import hashlib
+import json
+import os
+
+IZVOR = "static"
+CILJ = os.path.join(IZVOR, "zgrajeno")
+MANIFEST = os.path.join(CILJ, "manifest.json")
+
+_manifest = {}
+_manifest_cas = None
+
+
+def zgradi(izvor=IZVOR, cilj=CILJ):
+    """
+    Pripravi označene in stisnjene različice statičnih datotek.
+    Vrne manifest {izvirno ime: označeno ime}.
+    """
+    # starejše različice ostanejo, saj jih lahko še navajajo shranjene strani
+    os.makedirs(cilj, exist_ok=True)
+    manifest = {}
+    for koren, mape, datoteke in os.walk(izvor):
+        mape[:] = [mapa for mapa in mape if os.path.join(koren, mapa) != cilj]
+        for ime in sorted(datoteke):
+            pot = os.path.join(koren, ime)
+            relativna = os.path.relpath(pot, izvor).replace(os.sep, "/")
+            with open(pot, "rb") as dat:
+                vsebina = dat.read()
+            osnova, koncnica = os.path.splitext(relativna)
+            oznaceno = f"{osnova}.{hashlib.sha256(vsebina).hexdigest()[:12]}{koncnica}"
+            nova_pot = os.path.join(cilj, oznaceno)
+            os.makedirs(os.path.dirname(nova_pot), exist_ok=True)
+            with open(nova_pot, "wb") as dat:
+                dat.write(vsebina)
+            # slike so že stisnjene, zato se .gz shrani le, če kaj prihrani
+            stisnjeno = gzip.compress(vsebina, compresslevel=9, mtime=0)
+            if len(stisnjeno) < len(vsebina):
+                with open(nova_pot + ".gz", "wb") as dat:
+                    dat.write(stisnjeno)
+            manifest[relativna] = oznaceno
+    with open(os.path.join(cilj, "manifest.json"), "w", encoding="utf-8") as dat:
+        json.dump(manifest, dat, indent=2, sort_keys=True)
+    return manifest
+
+
+def nalozi_manifest():
+    """
+    Vrne manifest zadnje gradnje ali prazen slovar, če gradnje ni bilo.
+    Manifest se znova prebere, ko se datoteka spremeni.
+    """
+    global _manifest, _manifest_cas
+    try:
+        cas = os.stat(MANIFEST).st_mtime_ns
+    except FileNotFoundError:
+        _manifest, _manifest_cas = {}, None
+        return _manifest
+    if cas != _manifest_cas:
+        with open(MANIFEST, encoding="utf-8") as dat:
+            _manifest = json.load(dat)
+        _manifest_cas = cas
+    return _manifest
+
+
+def staticno(pot):
+    """
+    Vrne naslov statične datoteke. Če je pripravljena, vrne označeno različico.
+    """
+    oznaceno = nalozi_manifest().get(pot)
+    if oznaceno is None:
+        return f"/static/{pot}"
+    return f"/static/zgrajeno/{oznaceno}"
+
+
+if __name__ == "__main__":
+    manifest = zgradi()
+    print(f"Pripravljenih {len(manifest)} statičnih datotek v {CILJ}.")
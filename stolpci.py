@@ -0,0 +1,457 @@
+"""
+Stolpčna shramba rezultatov v pomnilniku.
+
+Tabela rezultat se v celoti naloži v tabele NumPy (po en stolpec za
+event, voznika, ekipo, mesto, točke in čas), poleg njih pa se zgradijo
+indeksi vrstic po voznikih, ekipah, progah in eventih. Razredi Voznik,
+Ekipa, Proga in Event so podrazredi razredov iz model.py, ki poizvedbe o
+rezultatih namesto v SQLite izvedejo nad shrambo. Metode sprejmejo tudi
+objekte iz modela, npr.
+
+    import stolpci
+    zmage = list(stolpci.Voznik.poisci_zmage(voznik))
+
+Iskanje in ostale poizvedbe, ki ne berejo rezultatov, ostanejo podedovane.
+Shramba se znova naloži, ko se spremeni generacija baze. Manjkajoče mesto
+in točke štejejo kot 0, manjkajoč čas pa kot NaN.
+
+Shramba se lahko zapiše v posnetek (glej posnetek.py), ki se ob zagonu
+procesa le preslika v pomnilnik:
+
+    python stolpci.py [baza.db] [baza.posnetek]
+
+Če je posnetek poleg baze enake generacije kot baza, se shramba naloži
+iz njega, sicer iz baze, nato pa se posnetek osveži.
+"""
+import sys
+
+import numpy as np
+
+import model
+import posnetek
+from povezava import povezave
+
+# podatkovni tipi stolpcev rezultatov
+STOLPCI = {
+    "event": np.int32,
+    "voznik": np.int32,
+    "ekipa": np.int32,
+    "mesto": np.int32,
+    "tocke": np.int32,
+    "cas": np.float64,
+}
+
+# polja shrambe, ki se poleg STOLPCI shranijo v posnetek
+IZPELJANI = ["leto", "proga", "leto_eventa", "proga_eventa", "krog_eventa"]
+INDEKSI = ["po_vozniku", "po_ekipi", "po_progi", "po_eventu"]
+IMENA = ["vozniki", "ekipe", "proge", "drzave"]
+
+
+class Indeks:
+    """
+    Indeks vrstic shrambe po enem stolpcu (npr. po vozniku).
+
+    Polja:
+    - red: številke vrstic, urejene po ključu
+    - zacetki: vrstice s ključem k so red[zacetki[k]:zacetki[k + 1]]
+    """
+
+    def __init__(self, red, zacetki):
+        """
+        Konstruktor indeksa.
+        """
+        self.red = red
+        self.zacetki = zacetki
+
+    @staticmethod
+    def zgradi(kljuci, *dodatni):
+        """
+        Vrne indeks po danih ključih vrstic. Vrstice z enakim ključem so
+        urejene po dodatnih stolpcih (prvi odloča), nato po številki vrstice.
+        """
+        red = np.lexsort(tuple(reversed(dodatni)) + (kljuci,))
+        zacetki = np.zeros(int(kljuci.max(initial=0)) + 2, dtype=np.int64)
+        np.cumsum(np.bincount(kljuci, minlength=len(zacetki) - 1), out=zacetki[1:])
+        return Indeks(red.astype(np.int32), zacetki)
+
+    def vrstice(self, kljuc):
+        """
+        Vrne številke vrstic z danim ključem.
+        """
+        if kljuc is None or not 0 <= kljuc < len(self.zacetki) - 1:
+            return self.red[:0]
+        return self.red[self.zacetki[kljuc]:self.zacetki[kljuc + 1]]
+
+
+class Stolpci:
+    """
+    Razred za rezultate, shranjene po stolpcih.
+
+    Polja:
+    - event, voznik, ekipa, mesto, tocke, cas: stolpci rezultatov
+    - leto_eventa, proga_eventa, krog_eventa: leto, id proge in krog za vsak id eventa
+    - leto, proga: leto in id proge za vsako vrstico rezultatov (izpeljana stolpca)
+    - vozniki, ekipe, proge, drzave: imena po id-jih
+    - po_vozniku, po_ekipi, po_progi: indeksi, urejeni po letu padajoče in mestu
+    - po_eventu: indeks, urejen po mestu
+    - generacija: generacija baze, iz katere so podatki
+    """
+
+    def __init__(self, stolpci, leto_eventa, proga_eventa, krog_eventa, vozniki, ekipe, proge, drzave,
+                 indeksi=None, generacija=None):
+        """
+        Konstruktor shrambe. Če izpeljana stolpca ali indeksi niso podani, se zgradijo.
+        """
+        for ime in STOLPCI:
+            setattr(self, ime, stolpci[ime])
+        self.leto_eventa = leto_eventa
+        self.proga_eventa = proga_eventa
+        self.krog_eventa = krog_eventa
+        self.leto = stolpci["leto"] if "leto" in stolpci else leto_eventa[self.event]
+        self.proga = stolpci["proga"] if "proga" in stolpci else proga_eventa[self.event]
+        self.vozniki = vozniki
+        self.ekipe = ekipe
+        self.proge = proge
+        self.drzave = drzave
+        self.generacija = generacija
+        if indeksi is None:
+            indeksi = {
+                "po_vozniku": Indeks.zgradi(self.voznik, -self.leto, self.mesto),
+                "po_ekipi": Indeks.zgradi(self.ekipa, -self.leto, self.mesto),
+                "po_progi": Indeks.zgradi(self.proga, -self.leto, self.mesto),
+                "po_eventu": Indeks.zgradi(self.event, self.mesto),
+            }
+        for ime, indeks in indeksi.items():
+            setattr(self, ime, indeks)
+
+    def __len__(self):
+        """
+        Vrne število rezultatov.
+        """
+        return len(self.event)
+
+    @staticmethod
+    def iz_baze(conn, generacija=None):
+        """
+        Vrne shrambo z vsemi rezultati iz baze.
+        """
+        vrstice = conn.execute("""
+            SELECT COALESCE(event_id, 0), COALESCE(voznik_id, 0), COALESCE(ekipa_id, 0),
+                   COALESCE(mesto, 0), COALESCE(tocke, 0), cas
+            FROM rezultat ORDER BY id
+        """).fetchall()
+        stolpci = {
+            ime: np.array(stolpec, dtype=tip)
+            for (ime, tip), stolpec in zip(STOLPCI.items(), zip(*vrstice) if vrstice else [()] * len(STOLPCI))
+        }
+        eventi = conn.execute("SELECT id, leto, id_proge, krog FROM event").fetchall()
+        leto_eventa = np.zeros(max((id for id, _, _, _ in eventi), default=0) + 1, dtype=np.int32)
+        proga_eventa = np.zeros_like(leto_eventa)
+        krog_eventa = np.zeros_like(leto_eventa)
+        for id, leto, id_proge, krog in eventi:
+            leto_eventa[id], proga_eventa[id], krog_eventa[id] = leto, id_proge or 0, krog or 0
+        proge = conn.execute("SELECT id, ime_proge, drzava FROM proga").fetchall()
+        return Stolpci(
+            stolpci, leto_eventa, proga_eventa, krog_eventa,
+            vozniki=po_id(conn.execute("SELECT id, ime_priimek FROM voznik")),
+            ekipe=po_id(conn.execute("SELECT id, ime FROM ekipa")),
+            proge=po_id((id, ime) for id, ime, _ in proge),
+            drzave=po_id((id, drzava) for id, _, drzava in proge),
+            generacija=generacija,
+        )
+
+    def v_posnetek(self, pot):
+        """
+        Shrambo skupaj z indeksi zapiše v posnetek.
+        """
+        tabele = {ime: getattr(self, ime) for ime in [*STOLPCI, *IZPELJANI]}
+        for ime in INDEKSI:
+            indeks = getattr(self, ime)
+            tabele[f"{ime}.red"], tabele[f"{ime}.zacetki"] = indeks.red, indeks.zacetki
+        seznami = {ime: getattr(self, ime) for ime in IMENA}
+        posnetek.zapisi(pot, tabele, seznami, self.generacija)
+
+    @staticmethod
+    def iz_posnetka(pot):
+        """
+        Vrne shrambo iz posnetka. Stolpci in indeksi se ne kopirajo,
+        temveč kažejo v datoteko, preslikano v pomnilnik.
+        """
+        tabele, seznami, generacija = posnetek.preberi(pot)
+        indeksi = {ime: Indeks(tabele[f"{ime}.red"], tabele[f"{ime}.zacetki"]) for ime in INDEKSI}
+        return Stolpci(tabele, tabele["leto_eventa"], tabele["proga_eventa"], tabele["krog_eventa"],
+                       **seznami, indeksi=indeksi, generacija=generacija)
+
+
+def po_id(vrstice):
+    """
+    Iz parov (id, vrednost) vrne seznam, v katerem je vrednost na mestu id.
+    """
+    vrstice = list(vrstice)
+    seznam = [None] * (max((id for id, _ in vrstice), default=0) + 1)
+    for id, vrednost in vrstice:
+        seznam[id] = vrednost
+    return seznam
+
+
+def po_sezonah(leta, kljuci, velikost):
+    """
+    Razdeli vrstice v skupine po (leto, ključ), urejene po letih padajoče
+    in ključih naraščajoče. Ključi morajo biti manjši od velikost.
+    Vrne leta in ključe skupin ter skupino vsake vrstice.
+    """
+    sestavljeni = leta.astype(np.int64) * -velikost + kljuci
+    razlicni, skupina = np.unique(sestavljeni, return_inverse=True)
+    leta_skupin, kljuci_skupin = np.divmod(razlicni, velikost)
+    return -leta_skupin, kljuci_skupin, skupina
+
+
+def sestej(skupina, utezi, st_skupin):
+    """
+    Vrne vsoto uteži vrstic v vsaki skupini.
+    """
+    return np.bincount(skupina, weights=utezi, minlength=st_skupin).astype(np.int64)
+
+
+_shramba = None
+
+
+def shramba():
+    """
+    Vrne shrambo za trenutno stanje baze in jo po potrebi znova naloži.
+    """
+    global _shramba
+    generacija = povezave.generacija()
+    if _shramba is None or _shramba.generacija != generacija:
+        pot = posnetek.pot_za(povezave.pot)
+        if posnetek.generacija(pot) == generacija:
+            nova = Stolpci.iz_posnetka(pot)
+        else:
+            nova = Stolpci.iz_baze(povezave.beri(), generacija)
+            # naslednji procesi naj shrambo le preslikajo
+            try:
+                nova.v_posnetek(pot)
+            except OSError:
+                pass
+        _shramba = nova
+    return _shramba
+
+
+class Voznik(model.Voznik):
+    """
+    Voznik, katerega rezultati se berejo iz shrambe.
+    """
+
+    def poisci_zmage(self):
+        """
+        Vrne zmage voznika.
+        """
+        s = shramba()
+        vrstice = s.po_vozniku.vrstice(self.id)
+        vrstice = vrstice[s.mesto[vrstice] == 1]
+        for proga, leto in zip(s.proga[vrstice].tolist(), s.leto[vrstice].tolist()):
+            yield (s.proge[proga], s.drzave[proga], leto)
+
+    def poisci_tocke(self):
+        """
+        Vrne število točk voznika po letih.
+        """
+        s = shramba()
+        vrstice = s.po_vozniku.vrstice(self.id)
+        leta, skupina = np.unique(s.leto[vrstice], return_inverse=True)
+        tocke = sestej(skupina, s.tocke[vrstice], len(leta))
+        for leto, st_tock in zip(leta[::-1].tolist(), tocke[::-1].tolist()):
+            yield (st_tock, leto)
+
+    def poisci_ekipe(self):
+        """
+        Vrne ekipo voznika po letih.
+        """
+        s = shramba()
+        vrstice = s.po_vozniku.vrstice(self.id)
+        leta, ekipe, _ = po_sezonah(s.leto[vrstice], s.ekipa[vrstice], len(s.ekipe))
+        for leto, ekipa in zip(leta.tolist(), ekipe.tolist()):
+            yield (s.ekipe[ekipa], leto)
+
+    def poisci_skupno_st_tock(self):
+        """
+        Vrne skupno število točk voznika.
+        """
+        s = shramba()
+        vrstice = s.po_vozniku.vrstice(self.id)
+        return int(s.tocke[vrstice].sum()) if len(vrstice) else None
+
+    def poisci_skupno_st_nastopov(self):
+        """
+        Vrne skupno število nastopov voznika.
+        """
+        return len(shramba().po_vozniku.vrstice(self.id))
+
+    def poisci_skupno_st_zmag(self):
+        """
+        Vrne skupno število zmag voznika.
+        """
+        s = shramba()
+        return int(np.count_nonzero(s.mesto[s.po_vozniku.vrstice(self.id)] == 1))
+
+    def poisci_skupno_st_stopnick(self):
+        """
+        Vrne skupno število stopničk voznika.
+        """
+        s = shramba()
+        mesta = s.mesto[s.po_vozniku.vrstice(self.id)]
+        return int(np.count_nonzero((mesta >= 1) & (mesta <= 3)))
+
+    def poisci_profil(self):
+        """
+        Vrne profil voznika (ProfilVoznika).
+        """
+        return Voznik.poisci_profile([self])[self.id]
+
+    @staticmethod
+    def poisci_profile(vozniki):
+        """
+        Vrne slovar {id voznika: ProfilVoznika} za vse podane voznike.
+        """
+        s = shramba()
+        profili = {voznik.id: model.ProfilVoznika(voznik) for voznik in vozniki}
+        for voznik_id, profil in profili.items():
+            vrstice = s.po_vozniku.vrstice(voznik_id)
+            mesta = s.mesto[vrstice]
+            leta, ekipe, skupina = po_sezonah(s.leto[vrstice], s.ekipa[vrstice], len(s.ekipe))
+            stevci = zip(
+                leta.tolist(),
+                ekipe.tolist(),
+                np.bincount(skupina, minlength=len(leta)).tolist(),
+                sestej(skupina, mesta == 1, len(leta)).tolist(),
+                sestej(skupina, (mesta >= 1) & (mesta <= 3), len(leta)).tolist(),
+                sestej(skupina, s.tocke[vrstice], len(leta)).tolist(),
+            )
+            for leto, ekipa, nastopi, zmage, stopnicke, tocke in stevci:
+                profil.dodaj(leto, s.ekipe[ekipa], nastopi, zmage, stopnicke, tocke)
+        return profili
+
+    @staticmethod
+    def poisci_zmage_voznikov(vozniki):
+        """
+        Vrne zmage vseh podanih voznikov.
+        """
+        for voznik_id in sorted({voznik.id for voznik in vozniki if voznik.id is not None}):
+            yield from Voznik.poisci_zmage(Voznik(None, id=voznik_id))
+
+
+class Ekipa(model.Ekipa):
+    """
+    Ekipa, katere rezultati se berejo iz shrambe.
+    """
+
+    def poisci_voznike(self):
+        """
+        Vrne voznike ekipe po letih skupaj s točkami, najhitrejšim časom in progo.
+        """
+        s = shramba()
+        vrstice = s.po_ekipi.vrstice(self.id)
+        if not len(vrstice):
+            return
+        leta, vozniki, skupina = po_sezonah(s.leto[vrstice], s.voznik[vrstice], len(s.vozniki))
+        tocke = sestej(skupina, s.tocke[vrstice], len(leta))
+        # prva vrstica vsake skupine po času je tista z najhitrejšim časom (NaN so na koncu)
+        po_casu = np.lexsort((s.cas[vrstice], skupina))
+        najhitrejse = vrstice[po_casu[np.searchsorted(skupina[po_casu], np.arange(len(leta)))]]
+        vrstni_red = np.lexsort((-tocke, -leta))
+        for i in vrstni_red.tolist():
+            cas = float(s.cas[najhitrejse[i]])
+            yield (
+                int(leta[i]),
+                s.vozniki[vozniki[i]],
+                int(tocke[i]),
+                model.formatiraj_cas(cas) if cas == cas and cas else "-",
+                s.proge[s.proga[najhitrejse[i]]],
+            )
+
+    def poisci_skupne_tocke_in_najboljsi_voznik(self):
+        """
+        Vrne skupno število točk ekipe in voznika, ki je prispeval največ točk.
+        Ob enakem številu točk šteje več nastopov za ekipo, nato manjši id voznika.
+        """
+        s = shramba()
+        vrstice = s.po_ekipi.vrstice(self.id)
+        if not len(vrstice):
+            return 0, None
+        vozniki, skupina, nastopi = np.unique(s.voznik[vrstice], return_inverse=True, return_counts=True)
+        tocke = sestej(skupina, s.tocke[vrstice], len(vozniki))
+        najboljsi = np.lexsort((vozniki, -nastopi, -tocke))[0]
+        return int(tocke.sum()), s.vozniki[vozniki[najboljsi]]
+
+
+class Proga(model.Proga):
+    """
+    Proga, katere rezultati se berejo iz shrambe.
+    """
+
+    def poisci_zmagovalce(self):
+        """
+        Vrne zmagovalce podane proge po letih.
+        """
+        s = shramba()
+        vrstice = s.po_progi.vrstice(self.id)
+        vrstice = vrstice[s.mesto[vrstice] == 1]
+        for voznik, leto in zip(s.voznik[vrstice].tolist(), s.leto[vrstice].tolist()):
+            yield (s.vozniki[voznik], leto)
+
+    def poisci_top3(self):
+        """
+        Vrne prva tri mesta na tej progi po letih.
+        """
+        s = shramba()
+        vrstice = s.po_progi.vrstice(self.id)
+        mesta = s.mesto[vrstice]
+        vrstice = vrstice[(mesta >= 1) & (mesta <= 3)]
+        for leto, mesto, voznik in zip(s.leto[vrstice].tolist(), s.mesto[vrstice].tolist(),
+                                       s.voznik[vrstice].tolist()):
+            yield (leto, mesto, s.vozniki[voznik])
+
+
+class Event(model.Event):
+    """
+    Event, katerega rezultati se berejo iz shrambe.
+    """
+
+    # eventi tega razreda imajo svoj slovar že naloženih
+    _eventi = {}
+    _generacija_eventov = None
+
+    def poisci_rezultate_eventa(self):
+        """
+        Vrne mesto, ime_priimek in število točk vseh voznikov na eventu.
+        """
+        s = shramba()
+        vrstice = s.po_eventu.vrstice(self.id)
+        vrstice = vrstice[s.mesto[vrstice] > 0]
+        for mesto, voznik, tocke in zip(s.mesto[vrstice].tolist(), s.voznik[vrstice].tolist(),
+                                        s.tocke[vrstice].tolist()):
+            yield (mesto, s.vozniki[voznik], tocke)
+
+    def poisci_najhitrejsi_krog(self):
+        """
+        Vrne ime proge, voznika z najhitrejšim časom (v formatu m:ss.SS) in njegov čas za ta event.
+        """
+        s = shramba()
+        vrstice = s.po_eventu.vrstice(self.id)
+        if not len(vrstice):
+            return (None, None, None)
+        casi = s.cas[vrstice]
+        if np.isnan(casi).all():
+            return (s.proge[s.proga[vrstice[0]]], s.vozniki[s.voznik[vrstice[0]]], None)
+        najhitrejsa = vrstice[np.nanargmin(casi)]
+        return (s.proge[s.proga[najhitrejsa]], s.vozniki[s.voznik[najhitrejsa]],
+                model.formatiraj_cas(float(s.cas[najhitrejsa])))
+
+
+if __name__ == "__main__":
+    pot_baze = sys.argv[1] if len(sys.argv) > 1 else povezave.pot
+    pot_posnetka = sys.argv[2] if len(sys.argv) > 2 else posnetek.pot_za(pot_baze)
+    povezave.nastavi(pot_baze)
+    shramba_baze = Stolpci.iz_baze(povezave.beri(), povezave.generacija())
+    shramba_baze.v_posnetek(pot_posnetka)
+    print(f"V {pot_posnetka} je zapisanih {len(shramba_baze)} rezultatov (generacija {shramba_baze.generacija}).")
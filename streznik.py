@@ -0,0 +1,148 @@
+"""
+Produkcijski strežnik za spletni vmesnik.
+
+Uporaba:
+    python streznik.py [--naslov 0.0.0.0] [--vrata 8080] [--procesi N] [--niti N] [--baza baza.db] [--stolpci]
+
+Strežnik teče v N procesih (privzeto toliko, kolikor je jeder), vsak
+proces pa zahteve obdeluje v bazenu niti. Vsaka nit ima svojo povezavo
+za branje, pisanja pa znotraj procesa tečejo prek ene povezave. Z
+`--procesi 1` teče le en proces z nitmi. Z `--stolpci` strani rezultate
+berejo iz stolpčne shrambe v pomnilniku (stolpci.py). Aplikacijo lahko
+namesto tega zaženemo tudi v poljubnem strežniku WSGI, npr.
+`gunicorn "spletni_vmesnik:ustvari_aplikacijo()"`.
+"""
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+
+from povezava import povezave
+import spletni_vmesnik
+
+NASLOV = "0.0.0.0"
+VRATA = 8080
+NITI = 8
+CAKAJOCE = 64  # sprejete zahteve na proces, ki čakajo na prosto nit
+
+
+class NitniStreznik(WSGIServer):
+    """
+    Strežnik WSGI, ki zahteve obdeluje v bazenu niti.
+    Ko je zasedenih vseh niti in mest v vrsti, novih povezav ne sprejema,
+    zato te čakajo v vrsti vtičnice in jih lahko prevzame drug proces.
+    """
+    niti = NITI
+    cakajoce = CAKAJOCE
+    request_queue_size = 128
+
+    def process_request(self, request, client_address):
+        """
+        Zahtevo preda bazenu niti. Bazen se ustvari šele v procesu, ki streže.
+        """
+        if getattr(self, "bazen", None) is None:
+            self.bazen = ThreadPoolExecutor(self.niti, thread_name_prefix="streznik")
+            self.prosta_mesta = threading.BoundedSemaphore(self.niti + self.cakajoce)
+        self.prosta_mesta.acquire()
+        self.bazen.submit(self._obdelaj, request, client_address)
+
+    def _obdelaj(self, request, client_address):
+        """
+        Obdela eno zahtevo v niti iz bazena.
+        """
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.prosta_mesta.release()
+
+
+class TihiUpravljalnik(WSGIRequestHandler):
+    """
+    Upravljalnik zahtev, ki izpisuje le napake.
+    """
+
+    def log_request(self, code="-", size="-"):
+        """
+        Zabeleži le neuspešne zahteve.
+        """
+        if str(code).startswith(("4", "5")):
+            super().log_request(code, size)
+
+
+def argument(ime, privzeto):
+    """
+    Vrne vrednost argumenta ukazne vrstice `--ime vrednost` ali privzeto vrednost.
+    """
+    if f"--{ime}" in sys.argv:
+        return type(privzeto)(sys.argv[sys.argv.index(f"--{ime}") + 1])
+    return privzeto
+
+
+def strezi(streznik):
+    """
+    Streže zahtevam, dokler proces ne dobi signala za konec.
+    """
+    try:
+        streznik.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        streznik.server_close()
+
+
+def zazeni_procese(streznik, st_procesov):
+    """
+    Razcepi proces na st_procesov delavcev, ki si delijo odprto vtičnico,
+    in jih ponovno zažene, če kateri od njih neha delati.
+    """
+    # povezave, odprte ob uvozu modela, se ne smejo deliti med procesi
+    povezave.zapri()
+    delavci = set()
+
+    def razcepi():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            strezi(streznik)
+            os._exit(0)
+        delavci.add(pid)
+
+    def koncaj(*_):
+        for pid in delavci:
+            os.kill(pid, signal.SIGTERM)
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, koncaj)
+    signal.signal(signal.SIGINT, koncaj)
+    for _ in range(st_procesov):
+        razcepi()
+    while True:
+        pid, _ = os.wait()
+        delavci.discard(pid)
+        razcepi()
+
+
+def main():
+    naslov = argument("naslov", NASLOV)
+    vrata = argument("vrata", VRATA)
+    st_procesov = argument("procesi", os.cpu_count() or 1)
+    NitniStreznik.niti = argument("niti", NITI)
+    aplikacija = spletni_vmesnik.ustvari_aplikacijo(argument("baza", povezave.pot), "--stolpci" in sys.argv)
+
+    streznik = make_server(naslov, vrata, aplikacija,
+                           server_class=NitniStreznik, handler_class=TihiUpravljalnik)
+    print(f"Strežem na http://{naslov}:{vrata}/ (procesi: {st_procesov}, niti na proces: {NitniStreznik.niti}).")
+    if st_procesov > 1 and hasattr(os, "fork"):
+        zazeni_procese(streznik, st_procesov)
+    else:
+        strezi(streznik)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
-from model import Voznik, Proga, Event, Ekipa
+import sys
+if "--stolpci" in sys.argv:
+    # rezultati se berejo iz stolpčne shrambe v pomnilniku
+    from stolpci import Voznik, Proga, Event, Ekipa
+else:
+    from model import Voznik, Proga, Event, Ekipa
 from enum import Enum
 import baza
 def vnesi_izbiro(moznosti):
@@ -49,16 +54,13 @@ def izpisi_profil(voznik):
     """
     Izpiše skupno število nastopov, zmag, stopničk in točk podanega voznika.
     """
-    st_nastopov = voznik.poisci_skupno_st_nastopov()
-    st_zmag = voznik.poisci_skupno_st_zmag()
-    st_stopnick = voznik.poisci_skupno_st_stopnick()
-    st_tock = voznik.poisci_skupno_st_tock()
+    profil = voznik.poisci_profil()
     
     print(f'Ime in priimek: {voznik.ime_priimek}')
-    print(f'Število nastopov: {st_nastopov}')
-    print(f'Število zmag: {st_zmag}')
-    print(f'Število stopničk: {st_stopnick}')
-    print(f'Število točk: {st_tock}')
+    print(f'Število nastopov: {profil.nastopi}')
+    print(f'Število zmag: {profil.zmage}')
+    print(f'Število stopničk: {profil.stopnicke}')
+    print(f'Število točk: {profil.tocke}')
 
 
 def poisci_voznika():
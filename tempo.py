@@ -0,0 +1,182 @@
+"""
+Analiza tempa iz skupnih časov dirk (rezultat.cas).
+
+Za vsak rezultat s časom se izračuna zaostanek za zmagovalcem eventa v
+sekundah in v odstotkih zmagovalčevega časa (normaliziran zaostanek), ki
+je primerljiv med progami različnih dolžin. Iz teh se za vsako sezono
+izračunajo porazdelitve po voznikih, ekipah in eventih: povprečni
+zaostanek, percentili normaliziranega zaostanka in njegov standardni
+odklon, ki meri konstantnost. Vse se izračuna nad stolpci shrambe
+(stolpci.py) brez zank po vrsticah.
+"""
+import numpy as np
+
+import stolpci
+from povezava import povezave
+
+PERCENTILI = (10, 25, 50, 75, 90)
+
+
+class Statistika:
+    """
+    Razred za porazdelitev zaostankov po skupinah (voznikih, ekipah ali eventih).
+
+    Polja:
+    - imena: seznam imen skupin
+    - stevilo: število časov v vsaki skupini
+    - zaostanek: povprečni zaostanek za zmagovalcem v sekundah
+    - percentili: normalizirani zaostanki (v %) pri PERCENTILI, oblike (skupine, len(PERCENTILI))
+    - odklon: standardni odklon normaliziranega zaostanka (v odstotnih točkah)
+    """
+
+    def __init__(self, imena, skupina, zaostanki, normalizirani):
+        """
+        Konstruktor statistike iz skupine, zaostanka in normaliziranega
+        zaostanka vsakega časa.
+        """
+        st_skupin = len(imena)
+        self.imena = imena
+        self.stevilo = np.bincount(skupina, minlength=st_skupin)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.zaostanek = np.bincount(skupina, weights=zaostanki, minlength=st_skupin) / self.stevilo
+            povprecje = np.bincount(skupina, weights=normalizirani, minlength=st_skupin) / self.stevilo
+            odmiki = (normalizirani - povprecje[skupina]) ** 2
+            self.odklon = np.sqrt(np.bincount(skupina, weights=odmiki, minlength=st_skupin) / self.stevilo)
+        self.percentili = percentili_skupin(skupina, normalizirani, st_skupin, PERCENTILI)
+
+    def vrstice(self):
+        """
+        Vrne seznam n-teric (ime, število, zaostanek, percentili, odklon),
+        urejen po mediani normaliziranega zaostanka.
+        """
+        mediana = self.percentili[:, PERCENTILI.index(50)]
+        vrstni_red = np.lexsort((np.arange(len(self.imena)), mediana))
+        return [
+            (self.imena[i], int(self.stevilo[i]), float(self.zaostanek[i]),
+             self.percentili[i].tolist(), float(self.odklon[i]))
+            for i in vrstni_red.tolist() if self.stevilo[i]
+        ]
+
+
+class TempoSezone:
+    """
+    Razred za analizo tempa ene sezone.
+
+    Polja:
+    - leto: sezona
+    - eventi: seznam parov (id eventa, ime proge) v kronološkem vrstnem redu
+    - vozniki: seznam imen voznikov, urejen po id-ju
+    - zaostanki: zaostanki voznikov za zmagovalcem v sekundah, oblike (eventi, vozniki), NaN brez časa
+    - po_voznikih, po_ekipah, po_eventih: statistike zaostankov
+    """
+
+    def __init__(self, leto, eventi, vozniki, zaostanki, po_voznikih, po_ekipah, po_eventih):
+        """
+        Konstruktor analize sezone.
+        """
+        self.leto = leto
+        self.eventi = eventi
+        self.vozniki = vozniki
+        self.zaostanki = zaostanki
+        self.po_voznikih = po_voznikih
+        self.po_ekipah = po_ekipah
+        self.po_eventih = po_eventih
+
+
+def percentili_skupin(skupina, vrednosti, st_skupin, q):
+    """
+    Vrne percentile q vrednosti v vsaki skupini, oblike (st_skupin, len(q)),
+    z linearno interpolacijo kot np.percentile. Prazne skupine dobijo NaN.
+    """
+    stevilo = np.bincount(skupina, minlength=st_skupin)
+    rezultat = np.full((st_skupin, len(q)), np.nan)
+    if not len(vrednosti):
+        return rezultat
+    urejene = vrednosti[np.lexsort((vrednosti, skupina))]
+    zacetki = np.cumsum(stevilo) - stevilo
+    polozaj = zacetki[:, None] + (stevilo[:, None] - 1) * (np.asarray(q) / 100)[None, :]
+    neprazne = stevilo > 0
+    polozaj = polozaj[neprazne]
+    spodnji = np.floor(polozaj).astype(np.int64)
+    zgornji = np.ceil(polozaj).astype(np.int64)
+    rezultat[neprazne] = urejene[spodnji] + (urejene[zgornji] - urejene[spodnji]) * (polozaj - spodnji)
+    return rezultat
+
+
+# zaostanki vseh rezultatov, veljavni za generacijo baze _generacija_zaostankov
+_zaostanki = None
+_generacija_zaostankov = None
+
+
+def zaostanki():
+    """
+    Vrne par tabel (zaostanek v sekundah, zaostanek v % zmagovalčevega časa)
+    za vse vrstice shrambe. Vrstice brez časa imajo NaN.
+    """
+    global _zaostanki, _generacija_zaostankov
+    s = stolpci.shramba()
+    if _generacija_zaostankov != s.generacija:
+        casi = np.where(s.cas > 0, s.cas, np.nan)
+        # najboljši čas eventa; eventi brez časov ostanejo neskončni
+        najboljsi = np.full(len(s.leto_eventa), np.inf)
+        np.fmin.at(najboljsi, s.event, casi)
+        zmagovalni = najboljsi[s.event]
+        zaostanek = casi - zmagovalni
+        _zaostanki = (zaostanek, zaostanek / zmagovalni * 100)
+        _generacija_zaostankov = s.generacija
+    return _zaostanki
+
+
+def izracunaj(leto):
+    """
+    Vrne analizo tempa dane sezone ali None, če v njej ni časov.
+    """
+    s = stolpci.shramba()
+    zaostanek, normaliziran = zaostanki()
+    vrstice = np.flatnonzero((s.leto == leto) & ~np.isnan(zaostanek))
+    if not len(vrstice):
+        return None
+    zaostanek, normaliziran = zaostanek[vrstice], normaliziran[vrstice]
+
+    # eventi sezone po krogih in id-jih kot v baza.KRONOLOSKO, vzeti iz iste shrambe kot rezultati
+    eventi_sezone = np.flatnonzero(s.leto_eventa == leto)
+    kronoloski = eventi_sezone[np.lexsort((eventi_sezone, s.krog_eventa[eventi_sezone]))]
+    zaporedje = np.zeros(len(s.leto_eventa), dtype=np.int64)
+    zaporedje[kronoloski] = np.arange(len(kronoloski))
+    zaporedni, event = np.unique(zaporedje[s.event[vrstice]], return_inverse=True)
+    eventi = kronoloski[zaporedni]
+    idji_voznikov, voznik = np.unique(s.voznik[vrstice], return_inverse=True)
+    idji_ekip, ekipa = np.unique(s.ekipa[vrstice], return_inverse=True)
+    imena_voznikov = [s.vozniki[id] for id in idji_voznikov.tolist()]
+    imena_eventov = [s.proge[s.proga_eventa[id]] for id in eventi.tolist()]
+
+    tabela = np.full((len(eventi), len(idji_voznikov)), np.nan)
+    tabela[event, voznik] = zaostanek
+    return TempoSezone(
+        leto,
+        list(zip(eventi.tolist(), imena_eventov)),
+        imena_voznikov,
+        tabela,
+        Statistika(imena_voznikov, voznik, zaostanek, normaliziran),
+        Statistika([s.ekipe[id] for id in idji_ekip.tolist()], ekipa, zaostanek, normaliziran),
+        Statistika(imena_eventov, event, zaostanek, normaliziran),
+    )
+
+
+# izračunane sezone {leto: TempoSezone}, veljavne za generacijo baze _generacija
+_sezone = {}
+_generacija = None
+
+
+def sezona(leto):
+    """
+    Vrne analizo tempa dane sezone ali None, če sezona nima časov.
+    Izračun se hrani, dokler se baza ne spremeni.
+    """
+    global _sezone, _generacija
+    generacija = povezave.generacija()
+    if generacija != _generacija:
+        _sezone, _generacija = {}, generacija
+    if leto not in _sezone:
+        _sezone[leto] = izracunaj(leto)
+    return _sezone[leto]